@@ -0,0 +1,51 @@
+"""admin query indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+Indexes are also declared on the models, so databases created by
+create_all already have them; every operation is IF [NOT] EXISTS.
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_agents_status_created_at_id", "agents",
+        ["status", "created_at", "id"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_users_created_at_id", "users",
+        ["created_at", "id"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_users_is_active_created_at", "users",
+        ["is_active", "created_at"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_users_roles", "users",
+        ["roles"], postgresql_using="gin", if_not_exists=True,
+    )
+    op.create_index(
+        "ix_agent_views_agent_id", "agent_views",
+        ["agent_id"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_agent_views_viewed_at", "agent_views",
+        ["viewed_at"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_views_viewed_at", table_name="agent_views", if_exists=True)
+    op.drop_index("ix_agent_views_agent_id", table_name="agent_views", if_exists=True)
+    op.drop_index("ix_users_roles", table_name="users", if_exists=True)
+    op.drop_index("ix_users_is_active_created_at", table_name="users", if_exists=True)
+    op.drop_index("ix_users_created_at_id", table_name="users", if_exists=True)
+    op.drop_index("ix_agents_status_created_at_id", table_name="agents", if_exists=True)
@@ -0,0 +1,109 @@
+"""stats counters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+
+Maintain per-status row counts for agents and users in stats_counters with
+triggers, so the admin dashboard reads them instead of counting rows.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all may already have created the (empty) table
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS stats_counters (
+            key VARCHAR PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_stats_counter(counter_key TEXT, delta BIGINT)
+        RETURNS VOID AS $$
+        BEGIN
+            INSERT INTO stats_counters (key, value) VALUES (counter_key, delta)
+            ON CONFLICT (key) DO UPDATE SET value = stats_counters.value + EXCLUDED.value;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION count_agents_by_status() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status IS NOT NULL THEN
+                PERFORM bump_stats_counter('agents:' || OLD.status, -1);
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status IS NOT NULL THEN
+                PERFORM bump_stats_counter('agents:' || NEW.status, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION count_users_by_state() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.is_active IS NOT DISTINCT FROM NEW.is_active THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.is_active IS NOT NULL THEN
+                PERFORM bump_stats_counter(
+                    CASE WHEN OLD.is_active THEN 'users:active' ELSE 'users:pending' END, -1
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.is_active IS NOT NULL THEN
+                PERFORM bump_stats_counter(
+                    CASE WHEN NEW.is_active THEN 'users:active' ELSE 'users:pending' END, 1
+                );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Block writers while seeding so no change slips in before the triggers exist
+    op.execute("LOCK TABLE agents, users IN SHARE ROW EXCLUSIVE MODE")
+
+    op.execute("""
+        INSERT INTO stats_counters (key, value)
+        SELECT 'agents:' || status, count(*) FROM agents
+        WHERE status IS NOT NULL GROUP BY status
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    """)
+    op.execute("""
+        INSERT INTO stats_counters (key, value)
+        SELECT CASE WHEN is_active THEN 'users:active' ELSE 'users:pending' END, count(*)
+        FROM users WHERE is_active IS NOT NULL GROUP BY is_active
+        ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+    """)
+
+    op.execute("""
+        CREATE TRIGGER agents_stats_counters
+        AFTER INSERT OR DELETE OR UPDATE OF status ON agents
+        FOR EACH ROW EXECUTE FUNCTION count_agents_by_status()
+    """)
+    op.execute("""
+        CREATE TRIGGER users_stats_counters
+        AFTER INSERT OR DELETE OR UPDATE OF is_active ON users
+        FOR EACH ROW EXECUTE FUNCTION count_users_by_state()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS users_stats_counters ON users")
+    op.execute("DROP TRIGGER IF EXISTS agents_stats_counters ON agents")
+    op.execute("DROP FUNCTION IF EXISTS count_users_by_state()")
+    op.execute("DROP FUNCTION IF EXISTS count_agents_by_status()")
+    op.execute("DROP FUNCTION IF EXISTS bump_stats_counter(TEXT, BIGINT)")
+    op.execute("DROP TABLE IF EXISTS stats_counters")
@@ -0,0 +1,23 @@
+"""review keyset index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_agent_reviews_agent_id_reviewed_at_id", "agent_reviews",
+        ["agent_id", "reviewed_at", "id"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_reviews_agent_id_reviewed_at_id", table_name="agent_reviews", if_exists=True)
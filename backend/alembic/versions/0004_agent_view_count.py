@@ -0,0 +1,66 @@
+"""agent view count
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 00:00:00
+
+Denormalize the number of agent_views rows onto agents.view_count and keep
+it current with statement-level triggers, so reads never count views.
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all may already have added the column on a fresh database
+    op.execute("ALTER TABLE agents ADD COLUMN IF NOT EXISTS view_count INTEGER NOT NULL DEFAULT 0")
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION count_agent_views() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE agents SET view_count = agents.view_count + changed.n
+                FROM (SELECT agent_id, count(*) AS n FROM new_views GROUP BY agent_id) AS changed
+                WHERE agents.id = changed.agent_id;
+            ELSE
+                UPDATE agents SET view_count = agents.view_count - changed.n
+                FROM (SELECT agent_id, count(*) AS n FROM old_views GROUP BY agent_id) AS changed
+                WHERE agents.id = changed.agent_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Block writers while backfilling so no view slips in before the triggers exist
+    op.execute("LOCK TABLE agent_views IN SHARE ROW EXCLUSIVE MODE")
+
+    op.execute("""
+        UPDATE agents SET view_count = counted.n
+        FROM (SELECT agent_id, count(*) AS n FROM agent_views GROUP BY agent_id) AS counted
+        WHERE agents.id = counted.agent_id
+    """)
+
+    op.execute("""
+        CREATE TRIGGER agent_views_insert_count
+        AFTER INSERT ON agent_views
+        REFERENCING NEW TABLE AS new_views
+        FOR EACH STATEMENT EXECUTE FUNCTION count_agent_views()
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_views_delete_count
+        AFTER DELETE ON agent_views
+        REFERENCING OLD TABLE AS old_views
+        FOR EACH STATEMENT EXECUTE FUNCTION count_agent_views()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS agent_views_delete_count ON agent_views")
+    op.execute("DROP TRIGGER IF EXISTS agent_views_insert_count ON agent_views")
+    op.execute("DROP FUNCTION IF EXISTS count_agent_views()")
+    op.execute("ALTER TABLE agents DROP COLUMN IF EXISTS view_count")
@@ -0,0 +1,39 @@
+"""unique rating and review per user
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The old SELECT-then-insert code could race and store duplicates;
+    # keep the newest row per (agent_id, user_id) before enforcing uniqueness.
+    for table in ("agent_ratings", "agent_reviews"):
+        op.execute(f"""
+            DELETE FROM {table} a
+            USING {table} b
+            WHERE a.agent_id = b.agent_id
+              AND a.user_id = b.user_id
+              AND a.id < b.id
+        """)
+
+    op.create_index(
+        "uq_agent_ratings_agent_id_user_id", "agent_ratings",
+        ["agent_id", "user_id"], unique=True, if_not_exists=True,
+    )
+    op.create_index(
+        "uq_agent_reviews_agent_id_user_id", "agent_reviews",
+        ["agent_id", "user_id"], unique=True, if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_agent_reviews_agent_id_user_id", table_name="agent_reviews", if_exists=True)
+    op.drop_index("uq_agent_ratings_agent_id_user_id", table_name="agent_ratings", if_exists=True)
@@ -0,0 +1,28 @@
+"""listing and view composite indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_agents_status_category_created_at_id", "agents",
+        ["status", "category", "created_at", "id"], if_not_exists=True,
+    )
+    op.create_index(
+        "ix_agent_views_agent_id_user_id_viewed_at", "agent_views",
+        ["agent_id", "user_id", "viewed_at"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_views_agent_id_user_id_viewed_at", table_name="agent_views", if_exists=True)
+    op.drop_index("ix_agents_status_category_created_at_id", table_name="agents", if_exists=True)
@@ -0,0 +1,40 @@
+"""trigram indexes for agent search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-15 00:00:00
+
+get_agents searches with ILIKE '%term%', which a B-tree cannot serve. GIN
+trigram indexes let the planner use an index scan instead of reading every
+agent. They live only in this migration because create_all runs before the
+pg_trgm extension exists. Servers without the contrib package skip them.
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX IF NOT EXISTS ix_agents_name_trgm
+                    ON agents USING gin (name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS ix_agents_description_trgm
+                    ON agents USING gin (description gin_trgm_ops);
+            ELSE
+                RAISE WARNING 'pg_trgm is not available; agent search stays unindexed';
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agents_description_trgm", table_name="agents", if_exists=True)
+    op.drop_index("ix_agents_name_trgm", table_name="agents", if_exists=True)
@@ -0,0 +1,23 @@
+"""agent author index
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_agents_author_id_created_at", "agents",
+        ["author_id", "created_at"], if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agents_author_id_created_at", table_name="agents", if_exists=True)
@@ -0,0 +1,31 @@
+"""agent full-text search vector
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all already adds the generated column on a fresh database
+    op.execute("""
+        ALTER TABLE agents ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))
+        ) STORED
+    """)
+    op.create_index(
+        "ix_agents_search_vector", "agents",
+        ["search_vector"], postgresql_using="gin", if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agents_search_vector", table_name="agents", if_exists=True)
+    op.execute("ALTER TABLE agents DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,29 @@
+"""analytics per-agent indexes
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-15 00:00:00
+"""
+from alembic import op
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ("ix_agent_views_agent_id_viewed_at", "agent_views", ["agent_id", "viewed_at"]),
+    ("ix_agent_clicks_agent_id_clicked_at", "agent_clicks", ["agent_id", "clicked_at"]),
+    ("ix_agent_sessions_agent_id_session_start", "agent_sessions", ["agent_id", "session_start"]),
+    ("ix_agent_ratings_agent_id_rated_at", "agent_ratings", ["agent_id", "rated_at"]),
+)
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
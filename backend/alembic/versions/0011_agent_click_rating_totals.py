@@ -0,0 +1,135 @@
+"""agent click and rating totals
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-15 00:00:00
+
+Denormalize click and rating totals onto agents (click_count, rating_count,
+rating_sum) and keep them current with statement-level triggers, like
+view_count in 0004. Ratings are upserted, so their trigger also handles
+UPDATE by subtracting the old rows and adding the new ones.
+"""
+from alembic import op
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # create_all may already have added the columns on a fresh database
+    op.execute("""
+        ALTER TABLE agents
+            ADD COLUMN IF NOT EXISTS click_count INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS rating_count INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS rating_sum INTEGER NOT NULL DEFAULT 0
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION count_agent_clicks() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE agents SET click_count = agents.click_count + changed.n
+                FROM (SELECT agent_id, count(*) AS n FROM new_clicks GROUP BY agent_id) AS changed
+                WHERE agents.id = changed.agent_id;
+            ELSE
+                UPDATE agents SET click_count = agents.click_count - changed.n
+                FROM (SELECT agent_id, count(*) AS n FROM old_clicks GROUP BY agent_id) AS changed
+                WHERE agents.id = changed.agent_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION sum_agent_ratings() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                UPDATE agents SET
+                    rating_count = agents.rating_count - changed.n,
+                    rating_sum = agents.rating_sum - changed.total
+                FROM (
+                    SELECT agent_id, count(*) AS n, sum(rating) AS total
+                    FROM old_ratings GROUP BY agent_id
+                ) AS changed
+                WHERE agents.id = changed.agent_id;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                UPDATE agents SET
+                    rating_count = agents.rating_count + changed.n,
+                    rating_sum = agents.rating_sum + changed.total
+                FROM (
+                    SELECT agent_id, count(*) AS n, sum(rating) AS total
+                    FROM new_ratings GROUP BY agent_id
+                ) AS changed
+                WHERE agents.id = changed.agent_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Block writers while backfilling so nothing slips in before the triggers exist
+    op.execute("LOCK TABLE agent_clicks, agent_ratings IN SHARE ROW EXCLUSIVE MODE")
+
+    op.execute("""
+        UPDATE agents SET click_count = counted.n
+        FROM (SELECT agent_id, count(*) AS n FROM agent_clicks GROUP BY agent_id) AS counted
+        WHERE agents.id = counted.agent_id
+    """)
+    op.execute("""
+        UPDATE agents SET rating_count = counted.n, rating_sum = counted.total
+        FROM (
+            SELECT agent_id, count(*) AS n, sum(rating) AS total
+            FROM agent_ratings GROUP BY agent_id
+        ) AS counted
+        WHERE agents.id = counted.agent_id
+    """)
+
+    op.execute("""
+        CREATE TRIGGER agent_clicks_insert_count
+        AFTER INSERT ON agent_clicks
+        REFERENCING NEW TABLE AS new_clicks
+        FOR EACH STATEMENT EXECUTE FUNCTION count_agent_clicks()
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_clicks_delete_count
+        AFTER DELETE ON agent_clicks
+        REFERENCING OLD TABLE AS old_clicks
+        FOR EACH STATEMENT EXECUTE FUNCTION count_agent_clicks()
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_ratings_insert_sum
+        AFTER INSERT ON agent_ratings
+        REFERENCING NEW TABLE AS new_ratings
+        FOR EACH STATEMENT EXECUTE FUNCTION sum_agent_ratings()
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_ratings_update_sum
+        AFTER UPDATE ON agent_ratings
+        REFERENCING OLD TABLE AS old_ratings NEW TABLE AS new_ratings
+        FOR EACH STATEMENT EXECUTE FUNCTION sum_agent_ratings()
+    """)
+    op.execute("""
+        CREATE TRIGGER agent_ratings_delete_sum
+        AFTER DELETE ON agent_ratings
+        REFERENCING OLD TABLE AS old_ratings
+        FOR EACH STATEMENT EXECUTE FUNCTION sum_agent_ratings()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS agent_ratings_delete_sum ON agent_ratings")
+    op.execute("DROP TRIGGER IF EXISTS agent_ratings_update_sum ON agent_ratings")
+    op.execute("DROP TRIGGER IF EXISTS agent_ratings_insert_sum ON agent_ratings")
+    op.execute("DROP TRIGGER IF EXISTS agent_clicks_delete_count ON agent_clicks")
+    op.execute("DROP TRIGGER IF EXISTS agent_clicks_insert_count ON agent_clicks")
+    op.execute("DROP FUNCTION IF EXISTS sum_agent_ratings()")
+    op.execute("DROP FUNCTION IF EXISTS count_agent_clicks()")
+    op.execute("""
+        ALTER TABLE agents
+            DROP COLUMN IF EXISTS rating_sum,
+            DROP COLUMN IF EXISTS rating_count,
+            DROP COLUMN IF EXISTS click_count
+    """)
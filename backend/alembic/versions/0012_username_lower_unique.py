@@ -0,0 +1,37 @@
+"""case-insensitive unique usernames
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-15 00:00:00
+
+A unique index on lower(username) stops "Alice" and "alice" from both
+registering and serves case-insensitive username lookups. Databases that
+already hold such pairs keep working without it until they are merged.
+"""
+from alembic import op
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM users GROUP BY lower(username) HAVING count(*) > 1
+            ) THEN
+                RAISE WARNING 'usernames differing only in case exist; uq_users_username_lower not created';
+            ELSE
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_users_username_lower
+                    ON users (lower(username));
+            END IF;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_users_username_lower", table_name="users", if_exists=True)
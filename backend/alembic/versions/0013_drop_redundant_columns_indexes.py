@@ -0,0 +1,43 @@
+"""drop redundant id indexes and event updated_at
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-15 00:00:00
+
+Every model had an extra B-tree on id next to its primary key, and
+agent_views.agent_id a single-column index that the (agent_id, ...)
+composites already cover. The event tables (views, clicks, sessions) are
+insert-only, so their updated_at column is dropped as well.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+ID_INDEXED_TABLES = (
+    "users", "agents", "agent_views", "agent_clicks",
+    "agent_sessions", "agent_ratings", "agent_reviews",
+)
+APPEND_ONLY_TABLES = ("agent_views", "agent_clicks", "agent_sessions")
+
+
+def upgrade() -> None:
+    for table in ID_INDEXED_TABLES:
+        op.drop_index(f"ix_{table}_id", table_name=table, if_exists=True)
+    op.drop_index("ix_agent_views_agent_id", table_name="agent_views", if_exists=True)
+    for table in APPEND_ONLY_TABLES:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS updated_at")
+
+
+def downgrade() -> None:
+    for table in APPEND_ONLY_TABLES:
+        op.add_column(table, sa.Column(
+            "updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ))
+        op.alter_column(table, "updated_at", server_default=None)
+    op.create_index("ix_agent_views_agent_id", "agent_views", ["agent_id"], if_not_exists=True)
+    for table in ID_INDEXED_TABLES:
+        op.create_index(f"ix_{table}_id", table, ["id"], if_not_exists=True)
@@ -0,0 +1,37 @@
+"""users.is_active not null
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-15 00:00:00
+
+Users with a NULL is_active were never let in (the auth check treats it as
+inactive) but were missing from both the active and pending stats counters.
+They become pending, which the stats counter trigger records, and the column
+is made NOT NULL so the two counters always add up to all users.
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE users SET is_active = false WHERE is_active IS NULL")
+    op.alter_column(
+        "users", "is_active",
+        existing_type=sa.Boolean(),
+        nullable=False,
+        server_default=sa.false()
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "users", "is_active",
+        existing_type=sa.Boolean(),
+        nullable=True,
+        server_default=None
+    )
@@ -1,8 +1,12 @@
+from threading import Lock
 from typing import Generator, Optional
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import verify_token
 from app.models.user import User
@@ -10,6 +14,23 @@ from app.services.auth_service import AuthService
 
 security = HTTPBearer()
 
+# Active users by username, so most authenticated requests skip the user SELECT.
+# Only non-secret columns are kept; admin actions that revoke access or change
+# roles call invalidate_user_cache. Off unless USER_CACHE_SECONDS is set, since
+# other worker processes would keep serving a revoked user until the TTL expires.
+_user_cache = TTLCache(maxsize=10_000, ttl=max(settings.USER_CACHE_SECONDS, 1))
+_user_cache_lock = Lock()
+_CACHED_USER_FIELDS = (
+    "id", "email", "username", "roles", "is_active",
+    "approved_by", "approved_at", "created_at", "updated_at"
+)
+
+
+def invalidate_user_cache() -> None:
+    """Forget cached users after an admin changes someone's access"""
+    with _user_cache_lock:
+        _user_cache.clear()
+
 
 def get_current_user(
     db: Session = Depends(get_db),
@@ -27,6 +48,14 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    cached = None
+    if settings.USER_CACHE_SECONDS:
+        with _user_cache_lock:
+            cached = _user_cache.get(username)
+    if cached is not None:
+        # A fresh detached copy per request, so handlers never share an instance
+        return User(**cached)
+    
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise HTTPException(
@@ -41,6 +70,10 @@ def get_current_user(
             detail="Inactive user"
         )
     
+    if settings.USER_CACHE_SECONDS:
+        with _user_cache_lock:
+            _user_cache[username] = {field: getattr(user, field) for field in _CACHED_USER_FIELDS}
+    
     return user
 
 
@@ -0,0 +1,89 @@
+import hashlib
+
+from fastapi import Request, Response, status
+from starlette.datastructures import Headers, MutableHeaders
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the values that determine a response"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _if_none_match(header: str, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag (weak comparison)"""
+    return _if_none_match(request.headers.get("if-none-match"), etag)
+
+
+def set_etag(response: Response, etag: str, max_age: int = 0) -> None:
+    """Attach the ETag; clients revalidate before reuse unless max_age allows a fresh window"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"private, max-age={max_age}" if max_age else "private, no-cache"
+
+
+def not_modified(etag: str, max_age: int = 0) -> Response:
+    """Empty 304 response for a client whose copy is still current"""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag, max_age)
+    return response
+
+
+class ETagMiddleware:
+    """Give successful GET responses without an ETag one hashed from the body
+
+    Endpoints that can fingerprint their data set their own ETag and skip the
+    database on a match; this covers the rest, saving the transfer (not the
+    work) when a client already has the same body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start = None
+        body = []
+
+        async def send_with_etag(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] == 200 and "etag" not in Headers(raw=message["headers"]):
+                    # Hold the response until the whole body is known
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+
+                content = b"".join(body)
+                etag = f'W/"{hashlib.sha1(content).hexdigest()}"'
+                headers = MutableHeaders(raw=start["headers"])
+                headers["ETag"] = etag
+                headers.setdefault("Cache-Control", "private, no-cache")
+                if _if_none_match(if_none_match, etag):
+                    for name in ("content-length", "content-type"):
+                        if name in headers:
+                            del headers[name]
+                    await send({**start, "status": status.HTTP_304_NOT_MODIFIED})
+                    await send({"type": "http.response.body", "body": b""})
+                else:
+                    await send(start)
+                    await send({"type": "http.response.body", "body": content})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
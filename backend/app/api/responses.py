@@ -0,0 +1,17 @@
+from typing import Optional, Union
+
+from fastapi import Response
+
+
+def json_response(content: Union[bytes, str], response: Optional[Response] = None) -> Response:
+    """Send JSON already serialized by a Pydantic model or TypeAdapter
+
+    Returning a Response skips FastAPI's response_model pass, which would dump,
+    re-validate and re-serialize every item; the handler's response_model still
+    documents the shape. Headers set on the injected response (ETag, cursor)
+    are carried over.
+    """
+    json = Response(content=content, media_type="application/json")
+    if response is not None:
+        json.headers.update(response.headers)
+    return json
@@ -1,71 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from threading import Lock
+
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import String, delete, exists, func, literal, select, true, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.core.database import get_db
-from app.api.deps import get_current_admin
-from app.schemas.agent import AgentResponse, AgentApproval
+from app.api.deps import get_current_admin, invalidate_user_cache
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.api.pagination import decode_cursor, set_next_cursor
+from app.api.responses import json_response
+from app.api.v1.endpoints.agents import AGENT_WITH_AUTHOR, invalidate_categories_cache
+from app.schemas.agent import AgentResponse, AgentResponseList, AgentApproval
 from app.schemas.auth import UserResponse
 from app.models.user import User
 from app.models.agent import Agent, AgentView, AgentStatus
+from app.models.stats import stats_counters
+from app.services.auth_service import invalidate_admin_emails_cache
 from app.services.email_service import email_service
 
 router = APIRouter()
 
+# Admin views fetch /stats on every load, so keep the result for a short
+# while and drop it whenever an admin action below changes the counts.
+_stats_cache = TTLCache(maxsize=1, ttl=30)
+_stats_cache_lock = Lock()
+
+
+def _invalidate_stats_cache() -> None:
+    with _stats_cache_lock:
+        _stats_cache.clear()
+
+
+def _ensure_user_exists(db: Session, user_id: int) -> None:
+    """Raise 404 when a conditional update matched nothing because the user is missing"""
+    if not db.query(exists().where(User.id == user_id)).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
 
 @router.get("/pending-agents", response_model=List[AgentResponse])
-async def get_pending_agents(
+def get_pending_agents(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of agents to skip"),
     limit: int = Query(50, ge=1, le=100, description="Number of agents to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; takes precedence over skip"),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Get all pending agent submissions for admin review"""
     
-    agents = db.query(Agent).filter(
+    # Fingerprint the queue (agents, their authors and view counts) before loading it
+    fingerprint = db.query(
+        func.max(Agent.updated_at),
+        func.count(Agent.id),
+        select(func.max(User.updated_at)).scalar_subquery(),
+        select(func.max(AgentView.id)).scalar_subquery()
+    ).filter(Agent.status == AgentStatus.PENDING.value).one()
+    etag = make_etag("pending-agents", skip, limit, cursor, *fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    query = db.query(Agent).options(*AGENT_WITH_AUTHOR).filter(
         Agent.status == AgentStatus.PENDING.value
-    ).order_by(Agent.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for agent in agents:
-        view_count = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        
-        agent_response = AgentResponse(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            app_url=agent.app_url,
-            category=agent.category,
-            status=agent.status,
-            created_at=agent.created_at,
-            author={
-                "id": agent.author.id,
-                "email": agent.author.email,
-                "username": agent.author.username,
-                "roles": agent.author.roles,
-                "is_active": agent.author.is_active,
-                "created_at": agent.author.created_at.isoformat(),
-                "approved_at": agent.author.approved_at.isoformat() if agent.author.approved_at else None
-            },
-            view_count=view_count,
-            approved_at=agent.approved_at
-        )
-        result.append(agent_response)
-    
-    return result
+    ).order_by(Agent.created_at.desc(), Agent.id.desc())
+
+    if cursor:
+        query = query.filter(tuple_(Agent.created_at, Agent.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+
+    agents = query.limit(limit).all()
+    set_next_cursor(response, agents, limit, key=lambda agent: (agent.created_at, agent.id))
+
+    return json_response(AgentResponseList.dump_json(
+        [AgentResponse.model_validate(agent) for agent in agents]
+    ), response)
 
 
 @router.patch("/agents/{agent_id}/approve")
-async def approve_reject_agent(
+def approve_reject_agent(
     agent_id: int,
     approval_data: AgentApproval,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Approve or reject an agent submission"""
     
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    agent = db.query(Agent).options(
+        joinedload(Agent.author)
+    ).filter(Agent.id == agent_id).first()
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,9 +122,13 @@ async def approve_reject_agent(
     agent.approved_at = datetime.utcnow()
     
     db.commit()
+    _invalidate_stats_cache()
+    if approval_data.approve:
+        invalidate_categories_cache()
     
-    # Notify agent author
-    await email_service.notify_agent_status(
+    # Notify agent author once the response has been sent
+    background_tasks.add_task(
+        email_service.notify_agent_status,
         user_email=agent.author.email,
         agent_name=agent.name,
         status=agent.status,
@@ -107,10 +143,13 @@ async def approve_reject_agent(
 
 
 @router.get("/users", response_model=List[UserResponse])
-async def get_all_users(
+def get_all_users(
+    request: Request,
+    response: Response,
     include_inactive: bool = Query(True, description="Include inactive users"),
     skip: int = Query(0, ge=0, description="Number of users to skip"),
     limit: int = Query(50, ge=1, le=100, description="Number of users to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; takes precedence over skip"),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
@@ -121,81 +160,93 @@ async def get_all_users(
     if not include_inactive:
         query = query.filter(User.is_active == True)
     
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for user in users:
-        user_response = UserResponse(
-            id=user.id,
-            email=user.email,
-            username=user.username,
-            roles=user.roles,
-            is_active=user.is_active,
-            created_at=user.created_at.isoformat(),
-            approved_at=user.approved_at.isoformat() if user.approved_at else None
-        )
-        result.append(user_response)
+    fingerprint = query.with_entities(func.max(User.updated_at), func.count(User.id)).one()
+    etag = make_etag("users", include_inactive, skip, limit, cursor, *fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    query = query.order_by(User.created_at.desc(), User.id.desc())
+    
+    if cursor:
+        query = query.filter(tuple_(User.created_at, User.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    
+    users = query.limit(limit).all()
+    set_next_cursor(response, users, limit, key=lambda user: (user.created_at, user.id))
     
-    return result
+    return [UserResponse.model_validate(user) for user in users]
 
 
 @router.get("/users/pending", response_model=List[UserResponse])
-async def get_pending_users(
+def get_pending_users(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of users to skip"),
+    limit: int = Query(50, ge=1, le=100, description="Number of users to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; takes precedence over skip"),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
-    """Get users pending approval"""
-    
-    users = db.query(User).filter(
-        User.is_active == False
-    ).order_by(User.created_at.desc()).all()
-    
-    result = []
-    for user in users:
-        user_response = UserResponse(
-            id=user.id,
-            email=user.email,
-            username=user.username,
-            roles=user.roles,
-            is_active=user.is_active,
-            created_at=user.created_at.isoformat(),
-            approved_at=None
-        )
-        result.append(user_response)
+    """Get users pending approval, one page at a time (follow X-Next-Cursor for more)"""
+    
+    query = db.query(User).filter(User.is_active == False)
+    
+    fingerprint = query.with_entities(func.max(User.updated_at), func.count(User.id)).one()
+    etag = make_etag("pending-users", skip, limit, cursor, *fingerprint)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
+    query = query.order_by(User.created_at.desc(), User.id.desc())
+    
+    if cursor:
+        query = query.filter(tuple_(User.created_at, User.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    
+    users = query.limit(limit).all()
+    set_next_cursor(response, users, limit, key=lambda user: (user.created_at, user.id))
     
-    return result
+    return [UserResponse.model_validate(user) for user in users]
 
 
 @router.patch("/users/{user_id}/approve")
-async def approve_user(
+def approve_user(
     user_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Approve a user registration"""
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+    # Activate user in a single round trip; the WHERE clause enforces the precondition
+    approved = db.execute(
+        update(User)
+        .where(User.id == user_id, User.is_active == False)
+        .values(
+            is_active=True,
+            approved_by=current_admin.id,
+            approved_at=datetime.utcnow()
         )
+        .returning(User.email, User.username)
+    ).first()
     
-    if user.is_active:
+    if approved is None:
+        _ensure_user_exists(db, user_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already active"
         )
     
-    # Activate user
-    user.is_active = True
-    user.approved_by = current_admin.id
-    user.approved_at = datetime.utcnow()
-    
     db.commit()
+    _invalidate_stats_cache()
     
-    # Notify user of approval
-    await email_service.notify_user_approval(user.email, user.username)
+    # Notify user of approval once the response has been sent
+    background_tasks.add_task(
+        email_service.notify_user_approval, approved.email, approved.username
+    )
     
     return {
         "message": "User approved successfully",
@@ -204,34 +255,37 @@ async def approve_user(
 
 
 @router.patch("/users/{user_id}/deactivate")
-async def deactivate_user(
+def deactivate_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Deactivate a user account"""
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    if user.id == current_admin.id:
+    if user_id == current_admin.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot deactivate your own account"
         )
     
-    if not user.is_active:
+    deactivated_id = db.execute(
+        update(User)
+        .where(User.id == user_id, User.is_active == True)
+        .values(is_active=False)
+        .returning(User.id)
+    ).scalar()
+    
+    if deactivated_id is None:
+        _ensure_user_exists(db, user_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already inactive"
         )
     
-    user.is_active = False
     db.commit()
+    _invalidate_stats_cache()
+    invalidate_user_cache()
+    invalidate_admin_emails_cache()
     
     return {
         "message": "User deactivated successfully",
@@ -240,35 +294,35 @@ async def deactivate_user(
 
 
 @router.delete("/users/{user_id}/reject")
-async def reject_user(
+def reject_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Reject/Delete a pending user registration"""
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
-    if user.is_active:
+    if user_id == current_admin.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot reject an active user"
+            detail="Cannot reject your own account"
         )
 
-    if user.id == current_admin.id:
+    # Delete only if still pending; the WHERE clause doubles as the existence check
+    rejected_id = db.execute(
+        delete(User)
+        .where(User.id == user_id, User.is_active == False)
+        .returning(User.id)
+    ).scalar()
+
+    if rejected_id is None:
+        _ensure_user_exists(db, user_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot reject your own account"
+            detail="Cannot reject an active user"
         )
 
-    # Delete the user
-    db.delete(user)
     db.commit()
+    _invalidate_stats_cache()
 
     return {
         "message": "User rejected and removed successfully",
@@ -277,74 +331,128 @@ async def reject_user(
 
 
 @router.patch("/users/{user_id}/make-admin")
-async def make_user_admin(
+def make_user_admin(
     user_id: int,
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Grant admin role to a user"""
 
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+    # Append the role in the database so concurrent edits cannot lose an update;
+    # roles is nullable, and NULL would make the containment check match nothing
+    current_roles = func.coalesce(User.roles, literal([], ARRAY(String)))
+    roles = db.execute(
+        update(User)
+        .where(
+            User.id == user_id,
+            User.is_active == True,
+            ~current_roles.contains(["admin"])
         )
+        .values(roles=func.array_append(current_roles, "admin"))
+        .returning(User.roles)
+        .execution_options(synchronize_session=False)
+    ).scalar()
 
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot grant admin role to inactive user"
-        )
-
-    if "admin" in user.roles:
+    if roles is None:
+        is_active = db.query(User.is_active).filter(User.id == user_id).scalar()
+        if is_active is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        if not is_active:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot grant admin role to inactive user"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already an admin"
         )
 
-    user.roles = list(set(user.roles + ["admin"]))
     db.commit()
+    _invalidate_stats_cache()
+    invalidate_user_cache()
+    invalidate_admin_emails_cache()
 
     return {
         "message": "User granted admin role successfully",
         "user_id": user_id,
-        "roles": user.roles
+        "roles": roles
     }
 
 
 @router.get("/stats")
-async def get_admin_stats(
+def get_admin_stats(
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin)
 ):
     """Get admin dashboard statistics"""
     
-    # Count agents by status
-    pending_agents = db.query(Agent).filter(Agent.status == AgentStatus.PENDING.value).count()
-    approved_agents = db.query(Agent).filter(Agent.status == AgentStatus.APPROVED.value).count()
-    rejected_agents = db.query(Agent).filter(Agent.status == AgentStatus.REJECTED.value).count()
+    with _stats_cache_lock:
+        stats = _stats_cache.get("stats")
     
-    # Count users
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    pending_users = db.query(User).filter(User.is_active == False).count()
-    admin_users = db.query(User).filter(User.roles.contains(["admin"])).count()
+    if stats is None:
+        stats = _compute_admin_stats(db)
+        with _stats_cache_lock:
+            _stats_cache["stats"] = stats
     
-    # Count total views
-    total_views = db.query(AgentView).count()
+    return stats
+
+
+def _compute_admin_stats(db: Session) -> dict:
+    """Run the aggregate queries behind the admin dashboard"""
     
-    # Recent activity (last 7 days)
-    from datetime import timedelta
     week_ago = datetime.utcnow() - timedelta(days=7)
     
-    recent_agents = db.query(Agent).filter(Agent.created_at >= week_ago).count()
-    recent_users = db.query(User).filter(User.created_at >= week_ago).count()
-    recent_views = db.query(AgentView).filter(AgentView.viewed_at >= week_ago).count()
+    # Per-status totals are maintained by triggers; only the time-windowed and
+    # role counts still need a scan. All of it comes back in a single round trip.
+    def counter_sum(condition):
+        return func.coalesce(func.sum(stats_counters.c.value).filter(condition), 0)
+    
+    status_counts = select(
+        counter_sum(stats_counters.c.key.startswith("agents:")),
+        counter_sum(stats_counters.c.key == f"agents:{AgentStatus.PENDING.value}"),
+        counter_sum(stats_counters.c.key == f"agents:{AgentStatus.APPROVED.value}"),
+        counter_sum(stats_counters.c.key == f"agents:{AgentStatus.REJECTED.value}"),
+        counter_sum(stats_counters.c.key == "users:active"),
+        counter_sum(stats_counters.c.key == "users:pending")
+    ).subquery()
+    
+    agent_counts = select(
+        func.count(Agent.id).filter(Agent.created_at >= week_ago)
+    ).subquery()
+    
+    user_counts = select(
+        func.count(User.id).filter(User.roles.contains(["admin"])),
+        func.count(User.id).filter(User.created_at >= week_ago)
+    ).subquery()
+    
+    view_counts = select(
+        func.count(AgentView.id),
+        func.count(AgentView.id).filter(AgentView.viewed_at >= week_ago)
+    ).subquery()
+    
+    (
+        total_agents, pending_agents, approved_agents, rejected_agents,
+        active_users, pending_users,
+        recent_agents,
+        admin_users, recent_users,
+        total_views, recent_views
+    ) = db.execute(
+        select(status_counts, agent_counts, user_counts, view_counts).select_from(
+            status_counts
+            .join(agent_counts, true())
+            .join(user_counts, true())
+            .join(view_counts, true())
+        )
+    ).one()
+    # is_active is NOT NULL, so every user is either active or pending approval
+    total_users = active_users + pending_users
     
     return {
         "agents": {
-            "total": pending_agents + approved_agents + rejected_agents,
+            "total": total_agents,
             "pending": pending_agents,
             "approved": approved_agents,
             "rejected": rejected_agents,
@@ -1,44 +1,133 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from threading import Lock
+
+from cachetools import TTLCache
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import exists, func, lambda_stmt, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Bundle, Session, joinedload, raiseload
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.core.database import get_db
 from app.api.deps import get_current_user, get_current_admin
+from app.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.api.pagination import decode_cursor, next_cursor, set_next_cursor
+from app.api.responses import json_response
 from app.schemas.agent import (
     AgentCreate,
     AgentResponse,
+    AgentResponseList,
+    AgentListResponse,
     AgentFilters,
     CategoryResponse,
     RatingCreate,
     ReviewCreate,
     ReviewUpdate,
     ReviewResponse,
+    ReviewResponseList,
     AgentRatingStats
 )
 from app.schemas.auth import UserResponse
 from app.models.user import User
 from app.models.agent import (
-    Agent, AgentView, AgentClick, AgentSession,
+    Agent, AgentView,
     AgentRating, AgentReview,
     AgentStatus, AgentCategory, ClickType
 )
+from app.services.auth_service import get_admin_emails
 from app.services.email_service import email_service
+from app.services.analytics_service import click_buffer, session_buffer
+from app.services.view_service import view_recorder
 
 router = APIRouter()
 
+VALID_CLICK_TYPES = frozenset(ct.value for ct in ClickType)
+
+# Load options for serializing agents: the author comes in the same statement,
+# any other relationship access raises instead of issuing a SELECT per agent
+AGENT_WITH_AUTHOR = (joinedload(Agent.author), raiseload("*"))
+CATEGORY_LABELS = tuple((cat.value, cat.value.replace('_', ' ').title()) for cat in AgentCategory)
+
+# Category counts only move when agents are approved or removed, so every
+# user loading the catalogue can share a short-lived copy.
+_categories_cache = TTLCache(maxsize=1, ttl=60)
+_categories_cache_lock = Lock()
+# Browsers may reuse the list this long before revalidating it
+CATEGORIES_MAX_AGE = 30
+
+
+class _DictBundle(Bundle):
+    """Bundle that loads its columns as a plain dict"""
+
+    def create_row_processor(self, query, procs, labels):
+        def proc(row):
+            return dict(zip(labels, (column_proc(row) for column_proc in procs)))
+        return proc
+
+
+# Columns AgentResponse needs, for listings that skip building ORM objects
+_AGENT_LIST_FIELDS = _DictBundle(
+    "agent",
+    Agent.id, Agent.name, Agent.description, Agent.app_url, Agent.category,
+    Agent.status, Agent.created_at, Agent.view_count, Agent.approved_at
+)
+_AUTHOR_FIELDS = _DictBundle(
+    "author",
+    User.id, User.email, User.username, User.roles, User.is_active,
+    User.created_at, User.approved_at
+)
+
+
+def invalidate_categories_cache() -> None:
+    """Drop the shared category counts after an agent is approved"""
+    with _categories_cache_lock:
+        _categories_cache.clear()
+
 
-@router.get("/")
-async def get_agents(
+def _upsert_rating(db: Session, agent_id: int, user_id: int, rating: int) -> None:
+    """Insert the user's rating of an agent, or overwrite the existing one"""
+    now = datetime.utcnow()
+    stmt = pg_insert(AgentRating).values(
+        agent_id=agent_id,
+        user_id=user_id,
+        rating=rating,
+        rated_at=now,
+        updated_at=now
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[AgentRating.agent_id, AgentRating.user_id],
+        set_={
+            "rating": stmt.excluded.rating,
+            "rated_at": stmt.excluded.rated_at,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    ))
+
+
+def _ensure_agent_exists(db: Session, agent_id: int) -> None:
+    """Raise 404 unless the agent exists, without loading the row"""
+    if not db.execute(lambda_stmt(lambda: select(exists().where(Agent.id == agent_id)))).scalar():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Agent not found"
+        )
+
+
+@router.get("/", response_model=AgentListResponse)
+def get_agents(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, description="Search in name and description"),
     status: Optional[str] = Query("approved", description="Filter by status"),
     skip: int = Query(0, ge=0, description="Number of agents to skip"),
     limit: int = Query(20, ge=1, le=100, description="Number of agents to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; takes precedence over skip"),
+    include_total: bool = Query(True, description="Count all matching agents; pass false to skip the COUNT"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get list of agents with optional filtering"""
+    """Get list of agents with optional filtering, newest first"""
     
     query = db.query(Agent)
     
@@ -54,69 +143,76 @@ async def get_agents(
         query = query.filter(Agent.category == category)
     
     if search:
-        search_term = f"%{search.lower()}%"
+        # Full-text match (stemmed words) backed by the search_vector GIN index;
+        # ilike keeps partial-word matches, served by the trigram indexes
+        search_term = f"%{search}%"
         query = query.filter(
+            Agent.search_vector.op("@@")(func.plainto_tsquery("english", search)) |
             Agent.name.ilike(search_term) | 
             Agent.description.ilike(search_term)
         )
     
-    # Get total count for pagination
-    total = query.count()
-    
-    # Get agents with pagination
-    agents = query.offset(skip).limit(limit).all()
+    if include_total and not cursor and skip == 0:
+        # The first page is what everyone polls: fingerprint it (agents, their
+        # authors and view counts) and answer 304 when the client is current.
+        # The fingerprint's count doubles as the total, so this costs no extra query.
+        fingerprint = query.with_entities(
+            func.max(Agent.updated_at),
+            func.count(Agent.id),
+            select(func.max(User.updated_at)).scalar_subquery(),
+            select(func.max(AgentView.id)).scalar_subquery()
+        ).one()
+        etag = make_etag("agents", status, category, search, limit, *fingerprint)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        total = fingerprint[1]
+    else:
+        total = None
+    
+    # Get agents with pagination, selecting just the response columns as
+    # plain rows so no ORM entities are built
+    page = query.join(User, Agent.author_id == User.id).with_entities(
+        _AGENT_LIST_FIELDS, _AUTHOR_FIELDS
+    ).order_by(Agent.created_at.desc(), Agent.id.desc())
+    if cursor:
+        page = page.filter(tuple_(Agent.created_at, Agent.id) < decode_cursor(cursor))
+    else:
+        page = page.offset(skip)
+    page = page.limit(limit)
+    
+    if include_total and total is None and not cursor:
+        # count(*) OVER () is evaluated before OFFSET/LIMIT, so the total rides along with the page
+        rows = page.add_columns(func.count().over().label("total")).all()
+        if rows:
+            total = rows[0].total
+    else:
+        rows = page.all()
     
-    # Build response with view counts
-    agent_list = []
-    for agent in agents:
-        view_count = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        
-        agent_data = {
-            "id": agent.id,
-            "name": agent.name,
-            "description": agent.description,
-            "app_url": agent.app_url,
-            "category": agent.category,
-            "status": agent.status,
-            "created_at": agent.created_at.isoformat(),
-            "author": {
-                "id": agent.author.id,
-                "email": agent.author.email,
-                "username": agent.author.username,
-                "roles": agent.author.roles,
-                "is_active": agent.author.is_active,
-                "created_at": agent.author.created_at.isoformat(),
-                "approved_at": agent.author.approved_at.isoformat() if agent.author.approved_at else None
-            },
-            "view_count": view_count,
-            "approved_at": agent.approved_at.isoformat() if agent.approved_at else None
-        }
-        agent_list.append(agent_data)
+    if include_total and total is None:
+        # Cursor pages and empty pages carry no window count (a full scan of the matches, so clients can opt out)
+        total = query.with_entities(func.count(Agent.id)).scalar()
     
-    return {
-        "agents": agent_list,
-        "total": total,
-        "limit": limit,
-        "offset": skip
-    }
+    agents = [row.agent for row in rows]
+    return json_response(AgentListResponse(
+        agents=[AgentResponse.model_validate({**row.agent, "author": row.author}) for row in rows],
+        total=total,
+        limit=limit,
+        offset=skip,
+        has_more=len(agents) == limit,
+        next_cursor=next_cursor(agents, limit, key=lambda agent: (agent["created_at"], agent["id"]))
+    ).model_dump_json(), response)
 
 
 @router.post("/", response_model=AgentResponse)
-async def create_agent(
+def create_agent(
     agent_data: AgentCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Submit a new agent"""
     
-    # Validate category
-    valid_categories = [cat.value for cat in AgentCategory]
-    if agent_data.category not in valid_categories:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid category. Must be one of: {valid_categories}"
-        )
-    
     # Create agent
     db_agent = Agent(
         name=agent_data.name,
@@ -131,28 +227,15 @@ async def create_agent(
     db.commit()
     db.refresh(db_agent)
     
-    # Notify admins about new submission
-    admins = db.query(User).filter(
-        User.roles.contains(["admin"]),
-        User.is_active == True
-    ).all()
-    
-    for admin in admins:
-        await email_service.send_notification_email(
-            to_email=admin.email,
-            subject="New Agent Submission - AI Agent Hub",
-            content=f"""
-            <h2>New Agent Submission</h2>
-            <p>A new agent has been submitted for review:</p>
-            <ul>
-                <li><strong>Name:</strong> {agent_data.name}</li>
-                <li><strong>Category:</strong> {agent_data.category}</li>
-                <li><strong>Author:</strong> {current_user.username}</li>
-                <li><strong>Description:</strong> {agent_data.description}</li>
-            </ul>
-            <p>Please review in the admin panel.</p>
-            """
-        )
+    # Notify admins about new submission once the response has been sent
+    background_tasks.add_task(
+        email_service.notify_admins_new_agent,
+        admin_emails=get_admin_emails(db),
+        agent_name=agent_data.name,
+        category=agent_data.category,
+        author_username=current_user.username,
+        description=agent_data.description
+    )
     
     return AgentResponse(
         id=db_agent.id,
@@ -168,8 +251,8 @@ async def create_agent(
             "username": current_user.username,
             "roles": current_user.roles,
             "is_active": current_user.is_active,
-            "created_at": current_user.created_at.isoformat(),
-            "approved_at": current_user.approved_at.isoformat() if current_user.approved_at else None
+            "created_at": current_user.created_at,
+            "approved_at": current_user.approved_at
         },
         view_count=0,
         approved_at=None
@@ -177,14 +260,18 @@ async def create_agent(
 
 
 @router.get("/{agent_id}", response_model=AgentResponse)
-async def get_agent(
+def get_agent(
     agent_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get specific agent and record view"""
     
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
+    # lambda_stmt caches the statement construction as well as its compiled SQL
+    agent = db.execute(lambda_stmt(
+        lambda: select(Agent).options(joinedload(Agent.author)).where(Agent.id == agent_id)
+    )).scalar_one_or_none()
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -200,21 +287,12 @@ async def get_agent(
                 detail="Not authorized to view this agent"
             )
     
-    # Record view (only for approved agents)
+    # Record view (only for approved agents, at most once an hour per user).
+    # Views are written in batches by a periodic task; flush after the response
+    # as well when a batch is due
     if agent.status == AgentStatus.APPROVED.value:
-        # Check if user already viewed this agent recently (within last hour)
-        recent_view = db.query(AgentView).filter(
-            AgentView.agent_id == agent_id,
-            AgentView.user_id == current_user.id,
-            AgentView.viewed_at >= datetime.utcnow() - timedelta(hours=1)
-        ).first()
-        
-        if not recent_view:
-            view = AgentView(agent_id=agent_id, user_id=current_user.id)
-            db.add(view)
-            db.commit()
-    
-    view_count = db.query(AgentView).filter(AgentView.agent_id == agent_id).count()
+        if view_recorder.record(agent_id, current_user.id) and view_recorder.flush_due():
+            background_tasks.add_task(view_recorder.flush)
     
     return AgentResponse(
         id=agent.id,
@@ -230,78 +308,70 @@ async def get_agent(
             "username": agent.author.username,
             "roles": agent.author.roles,
             "is_active": agent.author.is_active,
-            "created_at": agent.author.created_at.isoformat(),
-            "approved_at": agent.author.approved_at.isoformat() if agent.author.approved_at else None
+            "created_at": agent.author.created_at,
+            "approved_at": agent.author.approved_at
         },
-        view_count=view_count,
+        view_count=agent.view_count,
         approved_at=agent.approved_at
     )
 
 
 @router.get("/categories/list", response_model=List[CategoryResponse])
-async def get_categories(
+def get_categories(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all available categories with agent counts"""
     
-    categories = []
-    for cat in AgentCategory:
-        # Count approved agents in this category
-        count = db.query(Agent).filter(
-            Agent.category == cat.value,
+    with _categories_cache_lock:
+        categories = _categories_cache.get("categories")
+    
+    if categories is None:
+        # Count approved agents in every category at once
+        counts = dict(db.query(
+            Agent.category,
+            func.count(Agent.id)
+        ).filter(
             Agent.status == AgentStatus.APPROVED.value
-        ).count()
+        ).group_by(Agent.category).all())
         
-        categories.append(CategoryResponse(
-            value=cat.value,
-            label=cat.value.replace('_', ' ').title(),
-            count=count
-        ))
+        categories = [
+            CategoryResponse(value=value, label=label, count=counts.get(value, 0))
+            for value, label in CATEGORY_LABELS
+        ]
+        with _categories_cache_lock:
+            _categories_cache["categories"] = categories
+    
+    etag = make_etag("categories", *((cat.value, cat.count) for cat in categories))
+    if etag_matches(request, etag):
+        return not_modified(etag, CATEGORIES_MAX_AGE)
+    set_etag(response, etag, CATEGORIES_MAX_AGE)
     
     return categories
 
 
 @router.get("/my/submissions", response_model=List[AgentResponse])
-async def get_my_agents(
+def get_my_agents(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current user's agent submissions"""
     
-    agents = db.query(Agent).filter(Agent.author_id == current_user.id).all()
+    agents = db.query(Agent).options(*AGENT_WITH_AUTHOR).filter(
+        Agent.author_id == current_user.id
+    ).all()
     
-    result = []
-    for agent in agents:
-        view_count = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        
-        result.append(AgentResponse(
-            id=agent.id,
-            name=agent.name,
-            description=agent.description,
-            app_url=agent.app_url,
-            category=agent.category,
-            status=agent.status,
-            created_at=agent.created_at,
-            author={
-                "id": agent.author.id,
-                "email": agent.author.email,
-                "username": agent.author.username,
-                "roles": agent.author.roles,
-                "is_active": agent.author.is_active,
-                "created_at": agent.author.created_at.isoformat(),
-                "approved_at": agent.author.approved_at.isoformat() if agent.author.approved_at else None
-            },
-            view_count=view_count,
-            approved_at=agent.approved_at
-        ))
-    
-    return result
-
-
-@router.post("/{agent_id}/track-click")
-async def track_agent_click(
+    return json_response(AgentResponseList.dump_json(
+        [AgentResponse.model_validate(agent) for agent in agents]
+    ))
+
+
+@router.post("/{agent_id}/track-click", status_code=status.HTTP_202_ACCEPTED)
+def track_agent_click(
     agent_id: int,
+    background_tasks: BackgroundTasks,
     click_type: str = Query(..., description="Type of click: modal_open, new_tab, external_link"),
     referrer: Optional[str] = Query(None, description="Where the click originated"),
     db: Session = Depends(get_db),
@@ -310,30 +380,25 @@ async def track_agent_click(
     """Track agent click interactions"""
     
     # Verify agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Agent not found"
-        )
+    _ensure_agent_exists(db, agent_id)
     
     # Validate click type
-    valid_click_types = [ct.value for ct in ClickType]
-    if click_type not in valid_click_types:
+    if click_type not in VALID_CLICK_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid click type. Must be one of: {valid_click_types}"
+            detail=f"Invalid click type. Must be one of: {[ct.value for ct in ClickType]}"
         )
     
-    # Record the click
-    click = AgentClick(
+    # Queue the click; it is written with the next batch
+    click_buffer.add(
         agent_id=agent_id,
         user_id=current_user.id,
         click_type=click_type,
+        clicked_at=datetime.utcnow(),
         referrer=referrer
     )
-    db.add(click)
-    db.commit()
+    if click_buffer.flush_due():
+        background_tasks.add_task(click_buffer.flush)
     
     return {
         "message": "Click tracked successfully",
@@ -342,9 +407,10 @@ async def track_agent_click(
     }
 
 
-@router.post("/{agent_id}/track-session")
-async def track_agent_session(
+@router.post("/{agent_id}/track-session", status_code=status.HTTP_202_ACCEPTED)
+def track_agent_session(
     agent_id: int,
+    background_tasks: BackgroundTasks,
     duration_seconds: float = Query(..., description="Session duration in seconds"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -352,12 +418,7 @@ async def track_agent_session(
     """Track agent session duration"""
     
     # Verify agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Agent not found"
-        )
+    _ensure_agent_exists(db, agent_id)
     
     # Validate duration
     if duration_seconds < 0:
@@ -370,15 +431,15 @@ async def track_agent_session(
     session_end = datetime.utcnow()
     session_start = session_end - timedelta(seconds=duration_seconds)
     
-    session = AgentSession(
+    session_buffer.add(
         agent_id=agent_id,
         user_id=current_user.id,
         session_start=session_start,
         session_end=session_end,
         duration_seconds=duration_seconds
     )
-    db.add(session)
-    db.commit()
+    if session_buffer.flush_due():
+        background_tasks.add_task(session_buffer.flush)
     
     return {
         "message": "Session tracked successfully",
@@ -388,7 +449,7 @@ async def track_agent_session(
 # Rating & Review Endpoints to be added to agents.py
 
 @router.post("/{agent_id}/rate")
-async def rate_agent(
+def rate_agent(
     agent_id: int,
     rating_data: RatingCreate,
     db: Session = Depends(get_db),
@@ -397,12 +458,7 @@ async def rate_agent(
     """Rate an agent (1-5 stars) without a review"""
 
     # Verify agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Agent not found"
-        )
+    _ensure_agent_exists(db, agent_id)
 
     # Validate rating
     if rating_data.rating < 1 or rating_data.rating > 5:
@@ -411,81 +467,66 @@ async def rate_agent(
             detail="Rating must be between 1 and 5"
         )
 
-    # Check if user already rated this agent
-    existing_rating = db.query(AgentRating).filter(
-        AgentRating.agent_id == agent_id,
-        AgentRating.user_id == current_user.id
-    ).first()
-
-    if existing_rating:
-        # Update existing rating
-        existing_rating.rating = rating_data.rating
-        existing_rating.rated_at = datetime.utcnow()
-    else:
-        # Create new rating
-        new_rating = AgentRating(
-            agent_id=agent_id,
-            user_id=current_user.id,
-            rating=rating_data.rating
-        )
-        db.add(new_rating)
-
+    _upsert_rating(db, agent_id, current_user.id, rating_data.rating)
     db.commit()
 
-    # Calculate new average
-    all_ratings = db.query(AgentRating).filter(AgentRating.agent_id == agent_id).all()
-    avg_rating = sum(r.rating for r in all_ratings) / len(all_ratings)
+    # New average from the totals the agent_ratings trigger keeps on the agent
+    avg_rating, total_ratings = db.query(
+        Agent.average_rating,
+        Agent.rating_count
+    ).filter(Agent.id == agent_id).one()
 
     return {
         "message": "Rating submitted successfully",
         "rating": rating_data.rating,
-        "average_rating": round(avg_rating, 2),
-        "total_ratings": len(all_ratings)
+        "average_rating": round(float(avg_rating), 2),
+        "total_ratings": total_ratings
     }
 
 
 @router.get("/{agent_id}/rating-stats", response_model=AgentRatingStats)
-async def get_agent_rating_stats(
+def get_agent_rating_stats(
     agent_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get rating statistics for an agent"""
 
-    # Verify agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
+    # The review count doubles as the existence check
+    review_count = db.query(Agent.review_count).filter(Agent.id == agent_id).scalar()
+    if review_count is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found"
         )
 
-    # Get all ratings
-    ratings = db.query(AgentRating).filter(AgentRating.agent_id == agent_id).all()
+    # Count ratings per star value; count and average follow from the distribution
+    rating_rows = db.query(
+        AgentRating.rating,
+        func.count(AgentRating.id)
+    ).filter(AgentRating.agent_id == agent_id).group_by(AgentRating.rating).all()
 
-    # Calculate distribution
     distribution = {str(i): 0 for i in range(1, 6)}
-    for rating in ratings:
-        distribution[str(rating.rating)] += 1
+    for rating, count in rating_rows:
+        distribution[str(rating)] = count
 
-    # Get review count
-    review_count = db.query(AgentReview).filter(AgentReview.agent_id == agent_id).count()
+    rating_count = sum(count for _, count in rating_rows)
 
     # Calculate average
     avg_rating = 0.0
-    if ratings:
-        avg_rating = sum(r.rating for r in ratings) / len(ratings)
+    if rating_count:
+        avg_rating = sum(rating * count for rating, count in rating_rows) / rating_count
 
     return AgentRatingStats(
         average_rating=round(avg_rating, 2),
-        rating_count=len(ratings),
+        rating_count=rating_count,
         review_count=review_count,
         rating_distribution=distribution
     )
 
 
 @router.post("/{agent_id}/review", response_model=ReviewResponse)
-async def create_review(
+def create_review(
     agent_id: int,
     review_data: ReviewCreate,
     db: Session = Depends(get_db),
@@ -494,14 +535,16 @@ async def create_review(
     """Create or update a review for an agent"""
 
     # Verify agent exists and is approved
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
+    agent_status = db.execute(
+        lambda_stmt(lambda: select(Agent.status).where(Agent.id == agent_id))
+    ).scalar()
+    if agent_status is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found"
         )
 
-    if agent.status != AgentStatus.APPROVED.value:
+    if agent_status != AgentStatus.APPROVED.value:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot review agents that are not approved"
@@ -521,47 +564,31 @@ async def create_review(
             detail="Review must be at least 10 characters"
         )
 
-    # Check if user already reviewed this agent
-    existing_review = db.query(AgentReview).filter(
-        AgentReview.agent_id == agent_id,
-        AgentReview.user_id == current_user.id
-    ).first()
-
-    if existing_review:
-        # Update existing review
-        existing_review.rating = review_data.rating
-        existing_review.review_text = review_data.review_text
-        existing_review.updated_at = datetime.utcnow()
-        review = existing_review
-    else:
-        # Create new review
-        review = AgentReview(
-            agent_id=agent_id,
-            user_id=current_user.id,
-            rating=review_data.rating,
-            review_text=review_data.review_text
-        )
-        db.add(review)
+    # Create the review, or replace the user's existing one
+    now = datetime.utcnow()
+    stmt = pg_insert(AgentReview).values(
+        agent_id=agent_id,
+        user_id=current_user.id,
+        rating=review_data.rating,
+        review_text=review_data.review_text,
+        reviewed_at=now,
+        updated_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AgentReview.agent_id, AgentReview.user_id],
+        set_={
+            "rating": stmt.excluded.rating,
+            "review_text": stmt.excluded.review_text,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    ).returning(AgentReview)
+    review = db.execute(
+        stmt, execution_options={"populate_existing": True}
+    ).scalar_one()
 
     # Also update/create the rating
-    existing_rating = db.query(AgentRating).filter(
-        AgentRating.agent_id == agent_id,
-        AgentRating.user_id == current_user.id
-    ).first()
-
-    if existing_rating:
-        existing_rating.rating = review_data.rating
-        existing_rating.rated_at = datetime.utcnow()
-    else:
-        new_rating = AgentRating(
-            agent_id=agent_id,
-            user_id=current_user.id,
-            rating=review_data.rating
-        )
-        db.add(new_rating)
-
+    _upsert_rating(db, agent_id, current_user.id, review_data.rating)
     db.commit()
-    db.refresh(review)
 
     return ReviewResponse(
         id=review.id,
@@ -585,57 +612,46 @@ async def create_review(
 
 
 @router.get("/{agent_id}/reviews", response_model=List[ReviewResponse])
-async def get_agent_reviews(
+def get_agent_reviews(
     agent_id: int,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor from X-Next-Cursor; takes precedence over skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all reviews for an agent"""
 
     # Verify agent exists
-    agent = db.query(Agent).filter(Agent.id == agent_id).first()
-    if not agent:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Agent not found"
-        )
+    _ensure_agent_exists(db, agent_id)
 
     # Get reviews ordered by most recent
-    reviews = db.query(AgentReview).filter(
+    query = db.query(AgentReview).options(
+        joinedload(AgentReview.user),
+        raiseload("*")
+    ).filter(
         AgentReview.agent_id == agent_id
     ).order_by(
-        AgentReview.reviewed_at.desc()
-    ).offset(skip).limit(limit).all()
-
-    result = []
-    for review in reviews:
-        result.append(ReviewResponse(
-            id=review.id,
-            agent_id=review.agent_id,
-            user_id=review.user_id,
-            rating=review.rating,
-            review_text=review.review_text,
-            is_helpful_count=review.is_helpful_count,
-            reviewed_at=review.reviewed_at,
-            updated_at=review.updated_at,
-            user=UserResponse(
-                id=review.user.id,
-                email=review.user.email,
-                username=review.user.username,
-                roles=review.user.roles,
-                is_active=review.user.is_active,
-                created_at=review.user.created_at,
-                approved_at=review.user.approved_at
-            )
-        ))
+        AgentReview.reviewed_at.desc(),
+        AgentReview.id.desc()
+    )
+    
+    if cursor:
+        query = query.filter(tuple_(AgentReview.reviewed_at, AgentReview.id) < decode_cursor(cursor))
+    else:
+        query = query.offset(skip)
+    
+    reviews = query.limit(limit).all()
+    set_next_cursor(response, reviews, limit, key=lambda review: (review.reviewed_at, review.id))
 
-    return result
+    return json_response(ReviewResponseList.dump_json(
+        [ReviewResponse.model_validate(review) for review in reviews]
+    ), response)
 
 
 @router.delete("/{agent_id}/review")
-async def delete_review(
+def delete_review(
     agent_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -660,7 +676,7 @@ async def delete_review(
 
 
 @router.post("/{agent_id}/reviews/{review_id}/helpful")
-async def mark_review_helpful(
+def mark_review_helpful(
     agent_id: int,
     review_id: int,
     db: Session = Depends(get_db),
@@ -668,22 +684,23 @@ async def mark_review_helpful(
 ):
     """Mark a review as helpful (increment helpful count)"""
 
-    review = db.query(AgentReview).filter(
-        AgentReview.id == review_id,
-        AgentReview.agent_id == agent_id
-    ).first()
+    # Increment in SQL so concurrent votes are not lost
+    helpful_count = db.execute(
+        update(AgentReview)
+        .where(AgentReview.id == review_id, AgentReview.agent_id == agent_id)
+        .values(is_helpful_count=func.coalesce(AgentReview.is_helpful_count, 0) + 1)
+        .returning(AgentReview.is_helpful_count)
+    ).scalar_one_or_none()
 
-    if not review:
+    if helpful_count is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Review not found"
         )
 
-    # Increment helpful count
-    review.is_helpful_count += 1
     db.commit()
 
     return {
         "message": "Review marked as helpful",
-        "helpful_count": review.is_helpful_count
+        "helpful_count": helpful_count
     }
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.api.deps import get_auth_service, get_current_user
+from app.core.security import create_access_token
 from app.schemas.auth import (
     UserRegister, 
     UserLogin, 
@@ -38,14 +39,16 @@ async def register(
 
 
 @router.post("/verify-registration-otp", response_model=dict)
-async def verify_registration_otp(
+def verify_registration_otp(
     otp_data: OTPVerification,
+    background_tasks: BackgroundTasks,
     auth_service: AuthService = Depends(get_auth_service)
 ):
     """Verify OTP and complete registration"""
-    return await auth_service.verify_registration_otp(
+    return auth_service.verify_registration_otp(
         email=otp_data.email,
-        otp_code=otp_data.otp_code
+        otp_code=otp_data.otp_code,
+        background_tasks=background_tasks
     )
 
 
@@ -82,19 +85,11 @@ async def get_current_user_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get current user information"""
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        username=current_user.username,
-        roles=current_user.roles,
-        is_active=current_user.is_active,
-        created_at=current_user.created_at.isoformat(),
-        approved_at=current_user.approved_at.isoformat() if current_user.approved_at else None
-    )
+    return UserResponse.model_validate(current_user)
 
 
 @router.post("/change-password")
-async def change_password(
+def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
     auth_service: AuthService = Depends(get_auth_service)
@@ -114,26 +109,10 @@ async def refresh_token(
 ):
     """Refresh access token"""
     # Generate new token for current user
-    from app.core.security import create_access_token
-    from datetime import timedelta
-    from app.core.config import settings
-    
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        subject=current_user.username,
-        expires_delta=access_token_expires
-    )
+    access_token = create_access_token(subject=current_user.username)
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse(
-            id=current_user.id,
-            email=current_user.email,
-            username=current_user.username,
-            roles=current_user.roles,
-            is_active=current_user.is_active,
-            created_at=current_user.created_at.isoformat(),
-            approved_at=current_user.approved_at.isoformat() if current_user.approved_at else None
-        )
+        user=UserResponse.model_validate(current_user)
     )
\ No newline at end of file
@@ -1,13 +1,16 @@
+from collections import Counter
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, raiseload
 from typing import List
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
+from app.api.responses import json_response
 from app.schemas.auth import UserResponse
-from app.schemas.agent import AgentResponse
+from app.schemas.agent import AgentResponse, AgentResponseList
 from app.models.user import User
-from app.models.agent import Agent, AgentView
+from app.models.agent import Agent, AgentStatus
 
 router = APIRouter()
 
@@ -24,26 +27,26 @@ async def get_current_user_profile(
         username=current_user.username,
         roles=current_user.roles,
         is_active=current_user.is_active,
-        created_at=current_user.created_at.isoformat(),
-        approved_at=current_user.approved_at.isoformat() if current_user.approved_at else None
+        created_at=current_user.created_at,
+        approved_at=current_user.approved_at
     )
 
 
 @router.get("/me/agents", response_model=List[AgentResponse])
-async def get_my_agents(
+def get_my_agents(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all agents created by the current user"""
     
-    agents = db.query(Agent).filter(
+    # The author is current_user, so no relationship needs loading;
+    # raiseload turns any accidental lazy load into an error instead of N extra SELECTs
+    agents = db.query(Agent).options(raiseload("*")).filter(
         Agent.author_id == current_user.id
     ).order_by(Agent.created_at.desc()).all()
     
     result = []
     for agent in agents:
-        view_count = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        
         agent_response = AgentResponse(
             id=agent.id,
             name=agent.name,
@@ -58,60 +61,48 @@ async def get_my_agents(
                 "username": current_user.username,
                 "roles": current_user.roles,
                 "is_active": current_user.is_active,
-                "created_at": current_user.created_at.isoformat(),
-                "approved_at": current_user.approved_at.isoformat() if current_user.approved_at else None
+                "created_at": current_user.created_at,
+                "approved_at": current_user.approved_at
             },
-            view_count=view_count,
+            view_count=agent.view_count,
             approved_at=agent.approved_at
         )
         result.append(agent_response)
     
-    return result
+    return json_response(AgentResponseList.dump_json(result))
 
 
 @router.get("/me/stats")
-async def get_user_stats(
+def get_user_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get current user's statistics"""
     
-    # Count user's agents by status
-    from app.models.agent import AgentStatus
+    # One narrow query for all of the user's agents; the stats are aggregated here
+    user_agents = db.query(Agent.id, Agent.name, Agent.status, Agent.view_count).filter(
+        Agent.author_id == current_user.id
+    ).all()
     
-    total_agents = db.query(Agent).filter(Agent.author_id == current_user.id).count()
-    pending_agents = db.query(Agent).filter(
-        Agent.author_id == current_user.id,
-        Agent.status == AgentStatus.PENDING.value
-    ).count()
-    approved_agents = db.query(Agent).filter(
-        Agent.author_id == current_user.id,
-        Agent.status == AgentStatus.APPROVED.value
-    ).count()
-    rejected_agents = db.query(Agent).filter(
-        Agent.author_id == current_user.id,
-        Agent.status == AgentStatus.REJECTED.value
-    ).count()
+    # Count user's agents by status
+    status_counts = Counter(agent.status for agent in user_agents)
+    total_agents = len(user_agents)
+    pending_agents = status_counts[AgentStatus.PENDING.value]
+    approved_agents = status_counts[AgentStatus.APPROVED.value]
+    rejected_agents = status_counts[AgentStatus.REJECTED.value]
     
-    # Count total views on user's agents
-    user_agents = db.query(Agent).filter(Agent.author_id == current_user.id).all()
-    total_views = 0
-    for agent in user_agents:
-        views = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        total_views += views
+    # Sum the denormalized view counts
+    total_views = sum(agent.view_count for agent in user_agents)
     
-    # Get most popular agent
+    # Get most popular agent (lowest id wins a tie)
     most_popular_agent = None
-    max_views = 0
-    for agent in user_agents:
-        views = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        if views > max_views:
-            max_views = views
-            most_popular_agent = {
-                "id": agent.id,
-                "name": agent.name,
-                "views": views
-            }
+    top_agent = max(user_agents, key=lambda agent: (agent.view_count, -agent.id), default=None)
+    if top_agent and top_agent.view_count > 0:
+        most_popular_agent = {
+            "id": top_agent.id,
+            "name": top_agent.name,
+            "views": top_agent.view_count
+        }
     
     return {
         "agents": {
@@ -125,7 +116,7 @@ async def get_user_stats(
             "most_popular_agent": most_popular_agent
         },
         "profile": {
-            "member_since": current_user.created_at.isoformat(),
+            "member_since": current_user.created_at,
             "roles": current_user.roles,
             "is_admin": current_user.is_admin()
         }
@@ -133,7 +124,7 @@ async def get_user_stats(
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_profile(
+def get_user_profile(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -154,13 +145,13 @@ async def get_user_profile(
         username=user.username,
         roles=user.roles,
         is_active=user.is_active,
-        created_at=user.created_at.isoformat(),
-        approved_at=user.approved_at.isoformat() if user.approved_at else None
+        created_at=user.created_at,
+        approved_at=user.approved_at
     )
 
 
 @router.get("/{user_id}/agents", response_model=List[AgentResponse])
-async def get_user_agents(
+def get_user_agents(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -176,20 +167,20 @@ async def get_user_agents(
     
     # Only show approved agents for public view
     # Unless it's the user's own agents or admin viewing
+    # The author is the user loaded above, so no relationship needs loading
+    query = db.query(Agent).options(raiseload("*"))
     if current_user.id == user_id or current_user.is_admin():
-        agents = db.query(Agent).filter(
+        agents = query.filter(
             Agent.author_id == user_id
         ).order_by(Agent.created_at.desc()).all()
     else:
-        agents = db.query(Agent).filter(
+        agents = query.filter(
             Agent.author_id == user_id,
             Agent.status == "approved"
         ).order_by(Agent.created_at.desc()).all()
     
     result = []
     for agent in agents:
-        view_count = db.query(AgentView).filter(AgentView.agent_id == agent.id).count()
-        
         agent_response = AgentResponse(
             id=agent.id,
             name=agent.name,
@@ -204,12 +195,12 @@ async def get_user_agents(
                 "username": user.username,
                 "roles": user.roles,
                 "is_active": user.is_active,
-                "created_at": user.created_at.isoformat(),
-                "approved_at": user.approved_at.isoformat() if user.approved_at else None
+                "created_at": user.created_at,
+                "approved_at": user.approved_at
             },
-            view_count=view_count,
+            view_count=agent.view_count,
             approved_at=agent.approved_at
         )
         result.append(agent_response)
     
-    return result
\ No newline at end of file
+    return json_response(AgentResponseList.dump_json(result))
\ No newline at end of file
@@ -1,16 +1,28 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=settings.SQL_ECHO
 )
 
 SessionLocal = sessionmaker(
     autocommit=False, 
     autoflush=False, 
+    # Handlers read back what they just wrote; skip the reload SELECT after commit
+    expire_on_commit=False,
     bind=engine
 )
 
@@ -18,9 +30,25 @@ SessionLocal = sessionmaker(
 
 
 def get_db():
-    """Database dependency for FastAPI"""
+    """Database dependency for FastAPI: one pooled session per request
+
+    Sync handlers run in the threadpool, so a thread-scoped session would not
+    line up with the request; the connection goes back to the pool on close.
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def get_pool_status() -> str:
+    """Describe connection pool usage (size, checked in/out, overflow)"""
+    return engine.pool.status()
+
+
+def run_migrations() -> None:
+    """Apply pending Alembic migrations (triggers, backfills and other changes create_all cannot make)"""
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
@@ -0,0 +1,53 @@
+import logging
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements run so far by the current request; None outside a request
+_query_count: ContextVar[Optional[List[int]]] = ContextVar("query_count", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def track_queries(engine: Engine) -> None:
+    """Count the statements each request runs on this engine"""
+    event.listen(engine, "before_cursor_execute", _count_query)
+
+
+class QueryBudgetMiddleware:
+    """Warn when a request runs more SQL statements than the budget allows
+
+    A development aid: a handler that starts issuing a query per row (N+1)
+    shows up in the log instead of silently slowing down as data grows.
+    Sync handlers run in a copy of the request's context, so they update the
+    same counter.
+    """
+
+    def __init__(self, app, budget: int):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _query_count.set(counter)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _query_count.reset(token)
+            if counter[0] > self.budget:
+                logger.warning(
+                    f"{scope['method']} {scope['path']} ran {counter[0]} queries "
+                    f"(budget {self.budget})"
+                )
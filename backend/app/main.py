@@ -1,12 +1,22 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from datetime import datetime
 
 from app.core.config import settings
-from app.core.database import engine, SessionLocal
+from app.core.database import engine, SessionLocal, get_pool_status, run_migrations
 from app.core.security import get_password_hash
 from app.api.v1.api import api_router
+from app.api.etag import ETagMiddleware
+from app.core.query_budget import QueryBudgetMiddleware, track_queries
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.services.analytics_service import click_buffer, session_buffer
+from app.services.email_service import email_service
+from app.services.view_service import view_recorder
 
 # Import all models to register them with Base.metadata
 from app.models import user, agent
@@ -14,9 +24,6 @@ from app.models.base import Base
 from app.models.user import User
 from app.models.agent import Agent, AgentStatus, AgentCategory
 
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 def create_initial_data():
     """Create initial admin user and sample data on startup"""
     db = SessionLocal()
@@ -46,13 +53,51 @@ def create_initial_data():
     finally:
         db.close()
 
-# Create initial data on startup
-create_initial_data()
+async def flush_periodically(buffer) -> None:
+    """Write a buffer's queued rows every flush_interval seconds until cancelled"""
+    while True:
+        await asyncio.sleep(buffer.flush_interval)
+        await asyncio.to_thread(buffer.flush)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the database and SES on startup; flush buffered analytics periodically and on shutdown"""
+    await email_service.start()
+    # Warm SES in the background so a slow or unreachable endpoint doesn't delay startup
+    ses_warm_up = asyncio.create_task(email_service.warm_up())
+    
+    if settings.RUN_MIGRATIONS:
+        # Create tables, then apply migrations for changes create_all does not cover
+        Base.metadata.create_all(bind=engine)
+        run_migrations()
+        create_initial_data()
+    
+    # Queued views, clicks and sessions reach the database within flush_interval
+    # even when traffic is light
+    flush_tasks = [
+        asyncio.create_task(flush_periodically(buffer))
+        for buffer in (view_recorder, click_buffer, session_buffer)
+    ]
+    
+    yield
+    
+    for task in flush_tasks:
+        task.cancel()
+    ses_warm_up.cancel()
+    await email_service.close()
+    
+    # Write buffered views, clicks and sessions before the process exits
+    view_recorder.flush()
+    click_buffer.flush()
+    session_buffer.flush()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
     description="""
     AI Agent Hub API - A comprehensive platform for discovering, submitting, and managing AI agents.
     
@@ -78,10 +123,19 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"),
+    allow_headers=("authorization", "content-type"),
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Revalidation for GET responses that don't compute their own ETag
+app.add_middleware(ETagMiddleware)
+
+# Flag N+1 regressions while developing
+if settings.DEBUG:
+    track_queries(engine)
+    app.add_middleware(QueryBudgetMiddleware, budget=settings.QUERY_BUDGET)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -103,7 +157,8 @@ async def health_check():
     return {
         "status": "healthy",
         "version": settings.VERSION,
-        "environment": "development" if settings.DEBUG else "production"
+        "environment": "development" if settings.DEBUG else "production",
+        "database_pool": get_pool_status()
     }
 
 
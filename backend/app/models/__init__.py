@@ -1,5 +1,6 @@
 from .base import Base
 from .user import User
 from .agent import Agent, AgentView
+from .stats import stats_counters
 
-__all__ = ["Base", "User", "Agent", "AgentView"]
\ No newline at end of file
+__all__ = ["Base", "User", "Agent", "AgentView", "stats_counters"]
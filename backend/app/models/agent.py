@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column, Computed, Integer, String, Text, ForeignKey, DateTime, Float, Index,
+    case, cast, func, select
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import column_property, deferred, relationship
 from datetime import datetime
-from app.models.base import Base
+from app.models.base import AppendOnlyBase, Base
 import enum
 
 
@@ -31,6 +35,18 @@ class ClickType(enum.Enum):
 class Agent(Base):
     __tablename__ = "agents"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # Keyset pagination of the admin review queue
+        Index("ix_agents_status_created_at_id", "status", "created_at", "id"),
+        # Catalogue listing filtered by category, newest first
+        Index("ix_agents_status_category_created_at_id", "status", "category", "created_at", "id"),
+        # A user's own submissions, newest first
+        Index("ix_agents_author_id_created_at", "author_id", "created_at"),
+        # Full-text search over name and description
+        Index("ix_agents_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram indexes on name/description for search need pg_trgm, so
+        # they are created by migration 0007 rather than declared here.
+    )
     
     name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=False)
@@ -38,6 +54,23 @@ class Agent(Base):
     category = Column(String, nullable=False, index=True)
     status = Column(String, default=AgentStatus.PENDING.value, index=True)
     
+    # Full-text search document, generated by Postgres; deferred so agent loads skip it
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, ''))",
+        persisted=True
+    )))
+    
+    # Number of rows in agent_views, maintained by a trigger on that table
+    view_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Click and rating totals, maintained by triggers on agent_clicks and agent_ratings
+    click_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    average_rating = column_property(
+        case((rating_count > 0, cast(rating_sum, Float) / rating_count), else_=0.0)
+    )
+    
     # Author relationship
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     author = relationship("User", back_populates="agents", foreign_keys=[author_id])
@@ -47,44 +80,25 @@ class Agent(Base):
     approved_at = Column(DateTime, nullable=True)
     approved_by_user = relationship("User", foreign_keys=[approved_by])
     
+    # Analytics, rating and review collections grow without bound, so loading
+    # one implicitly raises; query the child table or aggregate in SQL instead.
+
     # Views relationship
-    views = relationship("AgentView", back_populates="agent", cascade="all, delete-orphan")
+    views = relationship("AgentView", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     # Click tracking relationship
-    clicks = relationship("AgentClick", back_populates="agent", cascade="all, delete-orphan")
+    clicks = relationship("AgentClick", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     # Session tracking relationship
-    sessions = relationship("AgentSession", back_populates="agent", cascade="all, delete-orphan")
+    sessions = relationship("AgentSession", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     # Rating & Review relationships
-    ratings = relationship("AgentRating", back_populates="agent", cascade="all, delete-orphan")
-    reviews = relationship("AgentReview", back_populates="agent", cascade="all, delete-orphan")
+    ratings = relationship("AgentRating", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
+    reviews = relationship("AgentReview", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Agent {self.name}>"
     
-    @property
-    def view_count(self) -> int:
-        """Get total view count for this agent"""
-        return len(self.views)
-
-    @property
-    def average_rating(self) -> float:
-        """Get average rating for this agent"""
-        if not self.ratings:
-            return 0.0
-        return sum(r.rating for r in self.ratings) / len(self.ratings)
-
-    @property
-    def rating_count(self) -> int:
-        """Get total number of ratings"""
-        return len(self.ratings)
-
-    @property
-    def review_count(self) -> int:
-        """Get total number of reviews"""
-        return len(self.reviews)
-
     @property
     def is_approved(self) -> bool:
         """Check if agent is approved"""
@@ -96,13 +110,19 @@ class Agent(Base):
         return self.status == AgentStatus.PENDING.value
 
 
-class AgentView(Base):
+class AgentView(AppendOnlyBase):
     __tablename__ = "agent_views"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # A user's latest view of an agent
+        Index("ix_agent_views_agent_id_user_id_viewed_at", "agent_id", "user_id", "viewed_at"),
+        # An agent's views over time
+        Index("ix_agent_views_agent_id_viewed_at", "agent_id", "viewed_at"),
+    )
 
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    viewed_at = Column(DateTime, default=datetime.utcnow)
+    viewed_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
     agent = relationship("Agent", back_populates="views")
@@ -112,9 +132,13 @@ class AgentView(Base):
         return f"<AgentView agent_id={self.agent_id} user_id={self.user_id}>"
 
 
-class AgentClick(Base):
+class AgentClick(AppendOnlyBase):
     __tablename__ = "agent_clicks"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # An agent's clicks over time; also backs the agent_id foreign key
+        Index("ix_agent_clicks_agent_id_clicked_at", "agent_id", "clicked_at"),
+    )
 
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -130,9 +154,13 @@ class AgentClick(Base):
         return f"<AgentClick agent_id={self.agent_id} user_id={self.user_id} type={self.click_type}>"
 
 
-class AgentSession(Base):
+class AgentSession(AppendOnlyBase):
     __tablename__ = "agent_sessions"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # An agent's sessions over time; also backs the agent_id foreign key
+        Index("ix_agent_sessions_agent_id_session_start", "agent_id", "session_start"),
+    )
 
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -151,6 +179,12 @@ class AgentSession(Base):
 class AgentRating(Base):
     __tablename__ = "agent_ratings"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # One rating per user per agent; target of the rating upsert
+        Index("uq_agent_ratings_agent_id_user_id", "agent_id", "user_id", unique=True),
+        # An agent's ratings over time
+        Index("ix_agent_ratings_agent_id_rated_at", "agent_id", "rated_at"),
+    )
 
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -168,6 +202,12 @@ class AgentRating(Base):
 class AgentReview(Base):
     __tablename__ = "agent_reviews"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # Keyset pagination of an agent's reviews
+        Index("ix_agent_reviews_agent_id_reviewed_at_id", "agent_id", "reviewed_at", "id"),
+        # One review per user per agent; target of the review upsert
+        Index("uq_agent_reviews_agent_id_user_id", "agent_id", "user_id", unique=True),
+    )
 
     agent_id = Column(Integer, ForeignKey("agents.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -182,4 +222,16 @@ class AgentReview(Base):
     user = relationship("User", back_populates="reviews")
 
     def __repr__(self):
-        return f"<AgentReview agent_id={self.agent_id} user_id={self.user_id} rating={self.rating}>"
\ No newline at end of file
+        return f"<AgentReview agent_id={self.agent_id} user_id={self.user_id} rating={self.rating}>"
+
+
+# Number of reviews, counted by the database. Deferred, so it only runs for
+# queries that ask for it with undefer(); reading it on a loaded agent issues
+# a single scalar SELECT instead of loading every review.
+Agent.review_count = column_property(
+    select(func.count(AgentReview.id))
+    .where(AgentReview.agent_id == Agent.id)
+    .correlate_except(AgentReview)
+    .scalar_subquery(),
+    deferred=True
+)
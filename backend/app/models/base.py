@@ -12,6 +12,13 @@ class Base:
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class AppendOnlyBase(Base):
+    """Base for event tables whose rows are inserted once and never updated"""
+    __abstract__ = True
+
+    updated_at = None
\ No newline at end of file
@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, Column, String, Table
+from app.models.base import Base
+
+# Row counts per status, kept current by database triggers on agents and users
+# (see the stats_counters migration). Keys look like "agents:pending" or "users:active".
+stats_counters = Table(
+    "stats_counters",
+    Base.metadata,
+    Column("key", String, primary_key=True),
+    Column("value", BigInteger, nullable=False, default=0),
+)
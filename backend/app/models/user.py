@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, false, func
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -8,12 +8,20 @@ from app.models.base import Base
 class User(Base):
     __tablename__ = "users"
     __allow_unmapped__ = True
+    __table_args__ = (
+        # Keyset pagination of the admin user listing
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Pending/active user listings and stats
+        Index("ix_users_is_active_created_at", "is_active", "created_at"),
+        # Role containment lookups (admins)
+        Index("ix_users_roles", "roles", postgresql_using="gin"),
+    )
     
     email = Column(String, unique=True, index=True, nullable=False)
     username = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     roles = Column(ARRAY(String), default=["user"])
-    is_active = Column(Boolean, default=False)
+    is_active = Column(Boolean, default=False, server_default=false(), nullable=False)
     
     # OTP fields
     otp_code = Column(String, nullable=True)
@@ -43,4 +51,8 @@ class User(Base):
     
     def has_role(self, role: str) -> bool:
         """Check if user has specific role"""
-        return role in (self.roles or [])
\ No newline at end of file
+        return role in (self.roles or [])
+
+
+# Usernames are unique regardless of case; also serves case-insensitive lookups
+Index("uq_users_username_lower", func.lower(User.username), unique=True)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, HttpUrl, TypeAdapter
+from typing import List, Optional
 from datetime import datetime
+from app.models.agent import AgentCategory
 from app.schemas.auth import UserResponse
 
 
@@ -8,10 +9,12 @@ class AgentCreate(BaseModel):
     name: str
     description: str
     app_url: str
-    category: str
+    category: AgentCategory
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        # Validated against the enum at parse time, kept as the plain string value
+        use_enum_values=True,
+        json_schema_extra={
             "example": {
                 "name": "AI Assistant",
                 "description": "An intelligent assistant for customer support",
@@ -19,6 +22,7 @@ class AgentCreate(BaseModel):
                 "category": "business"
             }
         }
+    )
 
 
 class AgentUpdate(BaseModel):
@@ -40,9 +44,9 @@ class AgentResponse(BaseModel):
     view_count: int = 0
     approved_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "name": "AI Assistant",
@@ -63,19 +67,34 @@ class AgentResponse(BaseModel):
                 "approved_at": "2023-01-01T00:00:00"
             }
         }
+    )
+
+
+# Serializers for list endpoints that return pre-serialized JSON
+AgentResponseList = TypeAdapter(List[AgentResponse])
+
+
+class AgentListResponse(BaseModel):
+    agents: List[AgentResponse]
+    total: Optional[int] = None
+    limit: int
+    offset: int
+    has_more: bool
+    next_cursor: Optional[str] = None
 
 
 class AgentApproval(BaseModel):
     approve: bool
     rejection_reason: Optional[str] = None
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "approve": True,
                 "rejection_reason": None
             }
         }
+    )
 
 
 class AgentFilters(BaseModel):
@@ -92,14 +111,15 @@ class CategoryResponse(BaseModel):
     label: str
     count: int = 0
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "value": "business",
                 "label": "Business",
                 "count": 15
             }
         }
+    )
 
 
 # Rating & Review Schemas
@@ -107,25 +127,27 @@ class CategoryResponse(BaseModel):
 class RatingCreate(BaseModel):
     rating: int  # 1-5 stars
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "rating": 5
             }
         }
+    )
 
 
 class ReviewCreate(BaseModel):
     rating: int  # 1-5 stars
     review_text: str
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "rating": 5,
                 "review_text": "Excellent AI agent! Very helpful and accurate."
             }
         }
+    )
 
 
 class ReviewUpdate(BaseModel):
@@ -144,9 +166,9 @@ class ReviewResponse(BaseModel):
     updated_at: datetime
     user: UserResponse
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "agent_id": 1,
@@ -166,6 +188,10 @@ class ReviewResponse(BaseModel):
                 }
             }
         }
+    )
+
+
+ReviewResponseList = TypeAdapter(List[ReviewResponse])
 
 
 class AgentRatingStats(BaseModel):
@@ -174,8 +200,8 @@ class AgentRatingStats(BaseModel):
     review_count: int
     rating_distribution: dict  # {1: 0, 2: 1, 3: 5, 4: 10, 5: 20}
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "average_rating": 4.5,
                 "rating_count": 36,
@@ -188,4 +214,5 @@ class AgentRatingStats(BaseModel):
                     "5": 20
                 }
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
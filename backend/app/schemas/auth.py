@@ -1,5 +1,6 @@
 from __future__ import annotations
-from pydantic import BaseModel, EmailStr
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import List, Optional
 
 
@@ -12,27 +13,29 @@ class UserRegister(BaseModel):
     username: str
     password: str
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "email": "user@example.com",
                 "username": "johndoe",
                 "password": "securepassword123"
             }
         }
+    )
 
 
 class OTPVerification(BaseModel):
     email: EmailStr
     otp_code: str
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "email": "user@example.com",
                 "otp_code": "123456"
             }
         }
+    )
 
 
 class Token(BaseModel):
@@ -51,12 +54,12 @@ class UserResponse(BaseModel):
     username: str
     roles: List[str]
     is_active: bool
-    created_at: str
-    approved_at: Optional[str] = None
+    created_at: datetime
+    approved_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "id": 1,
                 "email": "user@example.com",
@@ -67,6 +70,7 @@ class UserResponse(BaseModel):
                 "approved_at": "2023-01-01T00:00:00"
             }
         }
+    )
 
 
 class PasswordChange(BaseModel):
@@ -80,14 +84,15 @@ class OTPDisplay(BaseModel):
     otp_code: str
     expires_in_minutes: int
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "message": "OTP sent to your email",
                 "otp_code": "123456",
                 "expires_in_minutes": 5
             }
         }
+    )
 
 
 # Resolve forward references
@@ -0,0 +1,65 @@
+import logging
+import time
+from threading import Lock
+from typing import List
+
+from sqlalchemy import insert
+
+from app.core.database import SessionLocal
+from app.models.agent import AgentClick, AgentSession
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer:
+    """Collect analytics rows in memory and insert them in bulk
+
+    Tracking endpoints only append to the buffer; everything collected so far
+    is written in one INSERT by the periodic flush task, or after a request
+    once the buffer is big or old.
+    """
+
+    def __init__(self, model, flush_interval: float = 10.0, max_pending: int = 1000):
+        self.model = model
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = Lock()
+        self._pending: List[dict] = []
+        self._last_flush = time.monotonic()
+
+    def add(self, **row) -> None:
+        """Queue one row (column values keyed by name)"""
+        with self._lock:
+            self._pending.append(row)
+
+    def flush_due(self) -> bool:
+        """Check whether the buffer is big or old enough to be written"""
+        with self._lock:
+            return bool(self._pending) and (
+                len(self._pending) >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+
+    def flush(self) -> None:
+        """Write all queued rows in a single INSERT"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return
+
+        db = SessionLocal()
+        try:
+            db.execute(insert(self.model), pending)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to write {len(pending)} {self.model.__tablename__} rows: {e}")
+        finally:
+            db.close()
+
+
+# Create global buffers for click and session tracking
+click_buffer = EventBuffer(AgentClick)
+session_buffer = EventBuffer(AgentSession)
@@ -1,7 +1,12 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional
+from threading import Lock
+from typing import List, Optional
+from cachetools import TTLCache
+from sqlalchemy import exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+from fastapi import BackgroundTasks, HTTPException, status
 
 from app.core.security import (
     verify_password, 
@@ -11,8 +16,42 @@ from app.core.security import (
 )
 from app.core.config import settings
 from app.models.user import User
+from app.schemas.auth import UserResponse
 from app.services.email_service import email_service
 
+# How long an emailed OTP stays valid
+OTP_TTL = timedelta(minutes=settings.OTP_EXPIRE_MINUTES)
+
+# Emails of active admins for notification fan-out. The admin set rarely
+# changes; admin actions that grant the role or deactivate a user call
+# invalidate_admin_emails_cache.
+_admin_emails_cache = TTLCache(maxsize=1, ttl=300)
+_admin_emails_lock = Lock()
+
+
+def get_admin_emails(db: Session) -> List[str]:
+    """Emails of all active admins"""
+    with _admin_emails_lock:
+        emails = _admin_emails_cache.get("admins")
+    if emails is None:
+        emails = [
+            email for (email,) in db.execute(
+                select(User.email).where(
+                    User.roles.contains(["admin"]),
+                    User.is_active == True
+                )
+            )
+        ]
+        with _admin_emails_lock:
+            _admin_emails_cache["admins"] = emails
+    return list(emails)
+
+
+def invalidate_admin_emails_cache() -> None:
+    """Forget the cached admin emails after an admin role or account change"""
+    with _admin_emails_lock:
+        _admin_emails_cache.clear()
+
 
 class AuthService:
     """Authentication service for handling user auth logic"""
@@ -28,38 +67,39 @@ class AuthService:
     ) -> dict:
         """Register a new user and send OTP for email verification"""
 
-        # Check if user already exists
-        if self.db.query(User).filter(User.email == email).first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
+        # Hash off the event loop; Argon2 is deliberately slow
+        password_hash = await asyncio.to_thread(get_password_hash, password)
+
+        # Generate OTP for email verification
+        otp_code = generate_otp()
+
+        # Create new user (inactive until OTP verification and admin approval);
+        # the unique email/username indexes reject duplicates in the same statement
+        user_id = self.db.execute(
+            pg_insert(User)
+            .values(
+                email=email,
+                username=username,
+                password_hash=password_hash,
+                roles=["user"],
+                is_active=False,
+                otp_code=otp_code,
+                otp_expires_at=datetime.utcnow() + OTP_TTL
             )
+            .on_conflict_do_nothing()
+            .returning(User.id)
+        ).scalar()
 
-        if self.db.query(User).filter(User.username == username).first():
+        if user_id is None:
+            email_taken = self.db.execute(
+                select(exists().where(User.email == email))
+            ).scalar()
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already taken"
+                detail="Email already registered" if email_taken else "Username already taken"
             )
 
-        # Create new user (inactive until OTP verification and admin approval)
-        db_user = User(
-            email=email,
-            username=username,
-            password_hash=get_password_hash(password),
-            roles=["user"],
-            is_active=False
-        )
-
-        # Generate and store OTP for email verification
-        otp_code = generate_otp()
-        db_user.otp_code = otp_code
-        db_user.otp_expires_at = datetime.utcnow() + timedelta(
-            minutes=settings.OTP_EXPIRE_MINUTES
-        )
-
-        self.db.add(db_user)
         self.db.commit()
-        self.db.refresh(db_user)
 
         # Send OTP via email for verification
         email_result = await email_service.send_otp_email(
@@ -70,19 +110,22 @@ class AuthService:
 
         return {
             "message": "Registration initiated. Please verify your email with the OTP sent.",
-            "user_id": db_user.id,
+            "user_id": user_id,
             "otp_code": email_result.get("otp_code", ""),
             "expires_in_minutes": email_result.get("expires_in_minutes", 5)
         }
 
-    async def verify_registration_otp(
+    def verify_registration_otp(
         self,
         email: str,
-        otp_code: str
+        otp_code: str,
+        background_tasks: BackgroundTasks
     ) -> dict:
         """Verify OTP and complete registration"""
 
-        user = self.db.query(User).filter(User.email == email).first()
+        user = self.db.execute(
+            select(User).where(User.email == email)
+        ).scalar_one_or_none()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -107,8 +150,13 @@ class AuthService:
         user.otp_expires_at = None
         self.db.commit()
 
-        # Notify admins about new registration
-        await self._notify_admins_new_user(user.username, user.email)
+        # Notify admins about new registration once the response has been sent
+        background_tasks.add_task(
+            email_service.notify_admins_new_user,
+            admin_emails=get_admin_emails(self.db),
+            new_username=user.username,
+            new_user_email=user.email
+        )
 
         return {
             "message": "Email verified successfully. Waiting for admin approval.",
@@ -118,16 +166,16 @@ class AuthService:
     async def initiate_login(self, email: str) -> dict:
         """Initiate login process by sending OTP"""
 
-        user = self.db.query(User).filter(User.email == email).first()
+        # Lock the row so concurrent logins cannot interleave OTP updates
+        user = self.db.execute(
+            select(User).where(User.email == email).with_for_update()
+        ).scalar_one_or_none()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email address"
             )
 
-        # Refresh user object to get latest database state
-        self.db.refresh(user)
-
         if not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -137,9 +185,7 @@ class AuthService:
         # Generate and store OTP
         otp_code = generate_otp()
         user.otp_code = otp_code
-        user.otp_expires_at = datetime.utcnow() + timedelta(
-            minutes=settings.OTP_EXPIRE_MINUTES
-        )
+        user.otp_expires_at = datetime.utcnow() + OTP_TTL
 
         self.db.commit()
 
@@ -159,16 +205,16 @@ class AuthService:
     ) -> dict:
         """Verify OTP and complete login"""
 
-        user = self.db.query(User).filter(User.email == email).first()
+        # Lock the row so concurrent logins cannot interleave OTP updates
+        user = self.db.execute(
+            select(User).where(User.email == email).with_for_update()
+        ).scalar_one_or_none()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email address"
             )
 
-        # Refresh user object to get latest database state
-        self.db.refresh(user)
-
         # Check OTP validity
         if not user.otp_code or user.otp_expires_at < datetime.utcnow():
             raise HTTPException(
@@ -188,35 +234,28 @@ class AuthService:
         self.db.commit()
 
         # Create access token
-        access_token_expires = timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
-        access_token = create_access_token(
-            subject=user.username,
-            expires_delta=access_token_expires
-        )
+        access_token = create_access_token(subject=user.username)
 
         return {
             "access_token": access_token,
             "token_type": "bearer",
-            "user": {
-                "id": user.id,
-                "email": user.email,
-                "username": user.username,
-                "roles": user.roles,
-                "is_active": user.is_active,
-                "created_at": user.created_at.isoformat(),
-                "approved_at": user.approved_at.isoformat() if user.approved_at else None
-            }
+            "user": UserResponse.model_validate(user)
         }
     
     def get_user_by_username(self, username: str) -> Optional[User]:
-        """Get user by username"""
-        return self.db.query(User).filter(User.username == username).first()
+        """Get user by username, ignoring case"""
+        # Databases that predate uq_users_username_lower may still hold case-only
+        # duplicates; prefer the exact spelling, then the oldest account
+        return self.db.execute(
+            select(User)
+            .where(func.lower(User.username) == func.lower(username))
+            .order_by((User.username == username).desc(), User.id)
+            .limit(1)
+        ).scalars().first()
     
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.get(User, user_id)
     
     async def approve_user(self, user_id: int, approved_by: int) -> dict:
         """Approve a user registration"""
@@ -249,21 +288,6 @@ class AuthService:
             "user_id": user.id
         }
     
-    async def _notify_admins_new_user(self, username: str, email: str):
-        """Notify all admins about new user registration"""
-        
-        admins = self.db.query(User).filter(
-            User.roles.contains(["admin"]),
-            User.is_active == True
-        ).all()
-        
-        for admin in admins:
-            await email_service.notify_admin_new_user(
-                admin_email=admin.email,
-                new_username=username,
-                new_user_email=email
-            )
-    
     def change_password(
         self, 
         user_id: int, 
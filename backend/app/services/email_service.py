@@ -1,50 +1,172 @@
+import asyncio
+import hashlib
+import html
 import logging
-import boto3
+import smtplib
+from contextlib import AsyncExitStack
+from functools import partial
+from email.message import EmailMessage
+from string import Template
+from aiobotocore.config import AioConfig
+from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
-from typing import Optional
+from cachetools import TTLCache
+from typing import Awaitable, Callable, List, Optional
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# SES accepts at most 50 recipients per message, To and Bcc combined
+SES_MAX_RECIPIENTS = 50
 
-class EmailService:
-    """Email service for sending OTPs and notifications using AWS SES"""
+_CHARSET = "UTF-8"
 
-    def __init__(self):
-        self.use_ses = settings.USE_SES
-        self.from_email = settings.FROM_EMAIL
+# SES SMTP interface (STARTTLS), used instead of the API when USE_SES_SMTP is set
+SES_SMTP_PORT = 587
 
-        # Initialize AWS SES client if enabled
-        if self.use_ses:
-            self.ses_client = boto3.client(
-                'ses',
-                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                region_name=settings.AWS_REGION
-            )
-        
-    async def send_otp_email(self, to_email: str, otp_code: str, username: str) -> dict:
-        """Send OTP via email or display in console for development"""
+# Concurrent SES requests; also the size of the client's keep-alive connection pool
+SES_MAX_CONNECTIONS = 32
 
-        subject = "Your OTP for FARM"
-        html_body = f"""
+SES_CLIENT_CONFIG = AioConfig(
+    max_pool_connections=SES_MAX_CONNECTIONS,
+    retries={"max_attempts": 3, "mode": "adaptive"},
+    connect_timeout=3,
+    read_timeout=10,
+    connector_args={"keepalive_timeout": 60}
+)
+
+# Notifications sent in the last minute, so a retriggered one isn't sent twice;
+# only touched from the event loop, so no lock is needed
+_recent_notifications: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+# Connections opened at startup so the first OTP doesn't pay for credentials, DNS and TLS
+SES_WARM_CONNECTIONS = 4
+
+
+# Email bodies, parsed once; user-supplied values are HTML-escaped before substitution
+OTP_HTML = Template("""
         <html>
             <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
                 <div style="background-color: #f8f9fa; padding: 20px; border-radius: 10px;">
                     <h2 style="color: #333;">FARM - OTP Verification</h2>
-                    <p>Hello {username},</p>
+                    <p>Hello $username,</p>
                     <p>Your OTP code for login is:</p>
                     <div style="background-color: #fff; padding: 15px; border-radius: 5px; text-align: center; font-size: 24px; font-weight: bold; color: #ff6b35; letter-spacing: 5px;">
-                        {otp_code}
+                        $otp_code
                     </div>
-                    <p style="color: #666; margin-top: 15px;">This code is valid for {settings.OTP_EXPIRE_MINUTES} minutes.</p>
+                    <p style="color: #666; margin-top: 15px;">This code is valid for $minutes minutes.</p>
                     <p style="color: #999; font-size: 12px;">If you didn't request this code, please ignore this email.</p>
                 </div>
             </body>
         </html>
-        """
+        """)
+OTP_TEXT = Template("Your OTP code is: $otp_code. Valid for $minutes minutes.")
+
+USER_APPROVAL_HTML = Template("""
+            <h2>Welcome to FARM!</h2>
+            <p>Hello $username,</p>
+            <p>Your account has been approved and is now active.</p>
+            <p>You can now login to FARM and start exploring agents.</p>
+            <p>Best regards,<br>FARM Team</p>
+            """)
+
+ADMIN_NEW_USER_HTML = Template("""
+            <h2>New User Registration</h2>
+            <p>A new user has registered and needs approval:</p>
+            <ul>
+                <li><strong>Username:</strong> $username</li>
+                <li><strong>Email:</strong> $email</li>
+            </ul>
+            <p>Please review and approve the user in the admin panel.</p>
+            <p>Best regards,<br>FARM System</p>
+            """)
+
+ADMIN_NEW_AGENT_HTML = Template("""
+            <h2>New Agent Submission</h2>
+            <p>A new agent has been submitted for review:</p>
+            <ul>
+                <li><strong>Name:</strong> $name</li>
+                <li><strong>Category:</strong> $category</li>
+                <li><strong>Author:</strong> $author</li>
+                <li><strong>Description:</strong> $description</li>
+            </ul>
+            <p>Please review in the admin panel.</p>
+            """)
+
+AGENT_STATUS_HTML = Template("""
+            <h2>Agent Status Update</h2>
+            <p>Hello $username,</p>
+            <p>Your agent <strong>"$agent_name"</strong> has been $status_text.</p>
+            <p>You can view your agents in the dashboard.</p>
+            <p>Best regards,<br>FARM Team</p>
+            """)
+
+
+class EmailService:
+    """Email service for sending OTPs and notifications using AWS SES"""
+
+    def __init__(self):
+        self.use_ses = settings.USE_SES
+        self.use_smtp = settings.USE_SES and settings.USE_SES_SMTP
+        self.from_email = settings.FROM_EMAIL
+        self.ses_client = None
+        self._exit_stack = AsyncExitStack()
+        # SMTP is stateful: one shared connection, one message on it at a time
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """Open the async SES client if enabled; it lives until close()"""
+        if self.use_ses and not self.use_smtp and self.ses_client is None:
+            self.ses_client = await self._exit_stack.enter_async_context(get_session().create_client(
+                'ses',
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                region_name=settings.AWS_REGION,
+                config=SES_CLIENT_CONFIG
+            ))
 
-        text_body = f"Your OTP code is: {otp_code}. Valid for {settings.OTP_EXPIRE_MINUTES} minutes."
+    async def close(self) -> None:
+        """Close the SES client and its connection pool"""
+        await self._exit_stack.aclose()
+        self.ses_client = None
+        if self._smtp is not None:
+            smtp, self._smtp = self._smtp, None
+            try:
+                await asyncio.to_thread(smtp.quit)
+            except (smtplib.SMTPException, OSError):
+                pass
+
+    async def warm_up(self) -> None:
+        """Open a few SES connections ahead of the first email; failures are only logged"""
+        if self.use_smtp:
+            try:
+                async with self._smtp_lock:
+                    if self._smtp is None:
+                        self._smtp = await asyncio.to_thread(self._smtp_connect)
+            except (smtplib.SMTPException, OSError) as e:
+                logger.warning(f"SES SMTP warm-up failed: {e}")
+            return
+        if self.ses_client is None:
+            return
+        results = await asyncio.gather(*(
+            self.ses_client.get_send_quota()
+            for _ in range(SES_WARM_CONNECTIONS)
+        ), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            logger.warning(f"SES warm-up failed: {errors[0]}")
+        
+    async def send_otp_email(self, to_email: str, otp_code: str, username: str) -> dict:
+        """Send OTP via email or display in console for development"""
+
+        subject = "Your OTP for FARM"
+        html_body = OTP_HTML.substitute(
+            username=html.escape(username),
+            otp_code=otp_code,
+            minutes=settings.OTP_EXPIRE_MINUTES
+        )
+        text_body = OTP_TEXT.substitute(otp_code=otp_code, minutes=settings.OTP_EXPIRE_MINUTES)
 
         if self.use_ses:
             ses_result = await self._send_via_ses(
@@ -60,15 +182,11 @@ class EmailService:
             })
             return ses_result
         else:
-            # For development - display OTP in console and return it
-            logger.info(f"=== OTP EMAIL FOR {username} ({to_email}) ===")
-            logger.info(f"OTP Code: {otp_code}")
-            logger.info(f"Valid for: {settings.OTP_EXPIRE_MINUTES} minutes")
-            logger.info("=" * 50)
-
-            # Also print to console for visibility
-            print(f"\n🔐 OTP for {username}: {otp_code}")
-            print(f"⏱️  Valid for {settings.OTP_EXPIRE_MINUTES} minutes\n")
+            # For development - log the OTP (and echo it to the console in debug) and return it
+            message = f"OTP for {username} ({to_email}): {otp_code} (valid {settings.OTP_EXPIRE_MINUTES} minutes)"
+            logger.info(message)
+            if settings.DEBUG:
+                print(f"\n🔐 {message}\n")
 
             return {
                 "status": "success",
@@ -83,72 +201,138 @@ class EmailService:
         subject: str,
         content: str
     ) -> dict:
-        """Send notification email"""
-
+        """Send notification email, skipping an identical one sent within the last minute"""
         if self.use_ses:
-            return await self._send_via_ses(
+            return await self._send_deduped([to_email], subject, content, partial(
+                self._send_via_ses,
                 to_email=to_email,
                 subject=subject,
                 html_content=content,
                 text_content=content
-            )
-        else:
-            # For development - log notification
-            logger.info(f"=== NOTIFICATION EMAIL ===")
-            logger.info(f"To: {to_email}")
-            logger.info(f"Subject: {subject}")
-            logger.info(f"Content: {content}")
-            logger.info("=" * 30)
+            ))
+        return await self._send_deduped([to_email], subject, content, partial(
+            self._log_notification, to_email, subject, content
+        ))
 
-            print(f"\n📧 Email to {to_email}")
-            print(f"Subject: {subject}")
-            print(f"Content: {content}\n")
+    async def _log_notification(self, to_email: str, subject: str, content: str) -> dict:
+        """For development - log notification instead of sending it"""
+        message = f"Notification email to {to_email}\nSubject: {subject}\nContent: {content}"
+        logger.info(message)
+        if settings.DEBUG:
+            print(f"\n📧 {message}\n")
 
+        return {
+            "status": "success",
+            "message": "Notification sent successfully"
+        }
+
+    async def _send_deduped(
+        self,
+        recipients: List[str],
+        subject: str,
+        content: str,
+        send: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Run send unless the same notification went to the same recipients within the last minute"""
+        key = (tuple(recipients), subject, hashlib.blake2b(content.encode(), digest_size=16).digest())
+        if key in _recent_notifications:
             return {
-                "status": "success",
-                "message": "Notification sent successfully"
+                "status": "deduped",
+                "message": "Identical notification already sent"
             }
+
+        # Claim the key first so a concurrent duplicate is caught, and release it
+        # unless the send succeeds so a retry after a failure still goes out
+        _recent_notifications[key] = True
+        sent = False
+        try:
+            result = await send()
+            sent = result["status"] == "success"
+            return result
+        finally:
+            if not sent:
+                _recent_notifications.pop(key, None)
+    
+    async def send_notification_emails(
+        self,
+        to_emails: List[str],
+        subject: str,
+        content: str
+    ) -> List[dict]:
+        """Send the same notification to several recipients"""
+        if self.use_ses:
+            # One SES call per batch: the first recipient is the To address and the
+            # rest go on Bcc, so the sender mailbox isn't sent (or billed for) a copy
+            batches = [
+                to_emails[start:start + SES_MAX_RECIPIENTS]
+                for start in range(0, len(to_emails), SES_MAX_RECIPIENTS)
+            ]
+            return await asyncio.gather(*(
+                self._send_deduped(batch, subject, content, partial(
+                    self._send_via_ses,
+                    to_email=batch[0],
+                    subject=subject,
+                    html_content=content,
+                    text_content=content,
+                    bcc_emails=batch[1:]
+                ))
+                for batch in batches
+            ))
+        return await asyncio.gather(*(
+            self.send_notification_email(to_email=to_email, subject=subject, content=content)
+            for to_email in to_emails
+        ))
     
     async def _send_via_ses(
         self,
         to_email: str,
         subject: str,
         html_content: str,
-        text_content: str
+        text_content: str,
+        bcc_emails: Optional[List[str]] = None
     ) -> dict:
         """Send email via AWS SES"""
+        if self.use_smtp:
+            return await self._send_via_smtp(to_email, subject, html_content, text_content, bcc_emails)
+
+        destination = {'ToAddresses': [to_email]}
+        if bcc_emails:
+            destination['BccAddresses'] = bcc_emails
         try:
-            response = self.ses_client.send_email(
+            response = await self.ses_client.send_email(
                 Source=self.from_email,
-                Destination={
-                    'ToAddresses': [to_email]
-                },
+                Destination=destination,
                 Message={
                     'Subject': {
                         'Data': subject,
-                        'Charset': 'UTF-8'
+                        'Charset': _CHARSET
                     },
                     'Body': {
                         'Html': {
                             'Data': html_content,
-                            'Charset': 'UTF-8'
+                            'Charset': _CHARSET
                         },
                         'Text': {
                             'Data': text_content,
-                            'Charset': 'UTF-8'
+                            'Charset': _CHARSET
                         }
                     }
                 }
             )
 
-            logger.info(f"✅ Email sent successfully to {to_email}. MessageId: {response['MessageId']}")
-            print(f"\n✅ Email sent via AWS SES to: {to_email}")
-            print(f"   MessageId: {response['MessageId']}\n")
+            message_id = response['MessageId']
+            # Formatted only if a handler emits it; fields are also attached for structured handlers
+            logger.info(
+                "Email sent via AWS SES to %s. MessageId: %s", to_email, message_id,
+                extra={"to": to_email, "message_id": message_id}
+            )
+            if settings.DEBUG:
+                print(f"\n✅ Email sent via AWS SES to {to_email}. MessageId: {message_id}\n")
 
             return {
                 "status": "success",
                 "message": "Email sent successfully",
-                "message_id": response['MessageId']
+                "message_id": message_id
             }
 
         except ClientError as e:
@@ -165,40 +349,103 @@ class EmailService:
                 "message": f"Failed to send email: {str(e)}"
             }
     
+    def _smtp_connect(self) -> smtplib.SMTP:
+        """Open and authenticate a connection to the SES SMTP endpoint (blocking)"""
+        smtp = smtplib.SMTP(f"email-smtp.{settings.AWS_REGION}.amazonaws.com", SES_SMTP_PORT, timeout=10)
+        smtp.starttls()
+        smtp.login(settings.SES_SMTP_USERNAME, settings.SES_SMTP_PASSWORD)
+        return smtp
+
+    def _smtp_send(self, message: EmailMessage) -> None:
+        """Send on the shared connection, reconnecting once if SES dropped it (blocking)"""
+        if self._smtp is None:
+            self._smtp = self._smtp_connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._smtp = self._smtp_connect()
+            self._smtp.send_message(message)
+
+    async def _send_via_smtp(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: str,
+        bcc_emails: Optional[List[str]] = None
+    ) -> dict:
+        """Send email over the persistent SES SMTP connection"""
+        message = EmailMessage()
+        message["Subject"] = subject
+        message["From"] = self.from_email
+        message["To"] = to_email
+        if bcc_emails:
+            # send_message delivers to Bcc recipients and strips the header
+            message["Bcc"] = ", ".join(bcc_emails)
+        message.set_content(text_content, charset=_CHARSET)
+        message.add_alternative(html_content, subtype="html", charset=_CHARSET)
+
+        try:
+            async with self._smtp_lock:
+                await asyncio.to_thread(self._smtp_send, message)
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error(f"Failed to send email via SES SMTP: {e}")
+            return {
+                "status": "error",
+                "message": f"Failed to send email: {e}"
+            }
+
+        logger.info("Email sent via SES SMTP to %s", to_email, extra={"to": to_email})
+        if settings.DEBUG:
+            print(f"\n✅ Email sent via SES SMTP to {to_email}\n")
+
+        return {
+            "status": "success",
+            "message": "Email sent successfully"
+        }
+    
     async def notify_user_approval(self, user_email: str, username: str) -> dict:
         """Notify user of account approval"""
         return await self.send_notification_email(
             to_email=user_email,
             subject="Account Approved - FARM",
-            content=f"""
-            <h2>Welcome to FARM!</h2>
-            <p>Hello {username},</p>
-            <p>Your account has been approved and is now active.</p>
-            <p>You can now login to FARM and start exploring agents.</p>
-            <p>Best regards,<br>FARM Team</p>
-            """
+            content=USER_APPROVAL_HTML.substitute(username=html.escape(username))
         )
     
-    async def notify_admin_new_user(
+    async def notify_admins_new_user(
         self,
-        admin_email: str,
+        admin_emails: List[str],
         new_username: str,
         new_user_email: str
-    ) -> dict:
-        """Notify admin of new user registration"""
-        return await self.send_notification_email(
-            to_email=admin_email,
+    ) -> List[dict]:
+        """Notify admins of new user registration"""
+        return await self.send_notification_emails(
+            to_emails=admin_emails,
             subject="New User Registration - FARM",
-            content=f"""
-            <h2>New User Registration</h2>
-            <p>A new user has registered and needs approval:</p>
-            <ul>
-                <li><strong>Username:</strong> {new_username}</li>
-                <li><strong>Email:</strong> {new_user_email}</li>
-            </ul>
-            <p>Please review and approve the user in the admin panel.</p>
-            <p>Best regards,<br>FARM System</p>
-            """
+            content=ADMIN_NEW_USER_HTML.substitute(
+                username=html.escape(new_username),
+                email=html.escape(new_user_email)
+            )
+        )
+    
+    async def notify_admins_new_agent(
+        self,
+        admin_emails: List[str],
+        agent_name: str,
+        category: str,
+        author_username: str,
+        description: str
+    ) -> List[dict]:
+        """Notify admins of a new agent submission"""
+        return await self.send_notification_emails(
+            to_emails=admin_emails,
+            subject="New Agent Submission - AI Agent Hub",
+            content=ADMIN_NEW_AGENT_HTML.substitute(
+                name=html.escape(agent_name),
+                category=html.escape(category),
+                author=html.escape(author_username),
+                description=html.escape(description)
+            )
         )
     
     async def notify_agent_status(
@@ -213,13 +460,11 @@ class EmailService:
         return await self.send_notification_email(
             to_email=user_email,
             subject=f"Agent {status_text.title()} - FARM",
-            content=f"""
-            <h2>Agent Status Update</h2>
-            <p>Hello {username},</p>
-            <p>Your agent <strong>"{agent_name}"</strong> has been {status_text}.</p>
-            <p>You can view your agents in the dashboard.</p>
-            <p>Best regards,<br>FARM Team</p>
-            """
+            content=AGENT_STATUS_HTML.substitute(
+                username=html.escape(username),
+                agent_name=html.escape(agent_name),
+                status_text=status_text
+            )
         )
 
 
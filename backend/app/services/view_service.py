@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from cachetools import TTLCache
+
+from app.models.agent import AgentView
+from app.services.analytics_service import EventBuffer
+
+
+class ViewRecorder(EventBuffer):
+    """Buffer agent views in memory and write them to agent_views in batches
+
+    One bulk INSERT per flush means the agent_views trigger updates each
+    agent's view_count once per batch instead of once per page view, so stored
+    counts lag by up to flush_interval. A user's repeat views of an agent within
+    dedupe_window seconds are not counted.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 10.0,
+        max_pending: int = 500,
+        dedupe_window: int = 3600,
+        max_tracked_views: int = 50_000
+    ):
+        super().__init__(AgentView, flush_interval=flush_interval, max_pending=max_pending)
+        self._recent: TTLCache = TTLCache(maxsize=max_tracked_views, ttl=dedupe_window)
+
+    def record(self, agent_id: int, user_id: int) -> bool:
+        """Queue a view; returns False if this user viewed the agent recently"""
+        key = (agent_id, user_id)
+        with self._lock:
+            if key in self._recent:
+                return False
+            self._recent[key] = True
+        self.add(agent_id=agent_id, user_id=user_id, viewed_at=datetime.utcnow())
+        return True
+
+
+# Create global view recorder instance
+view_recorder = ViewRecorder()
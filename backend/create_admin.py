@@ -8,6 +8,9 @@ import sys
 import os
 from datetime import datetime
 
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 # Add the app directory to the Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
@@ -38,7 +41,6 @@ def create_admin_user(db_session):
     
     db_session.add(admin_user)
     db_session.commit()
-    db_session.refresh(admin_user)
     
     print("✅ Admin user created successfully!")
     print(f"   Email: {admin_user.email}")
@@ -73,24 +75,34 @@ def create_sample_users(db_session, admin_user):
         }
     ]
     
-    created_users = []
-    for user_data in sample_users:
-        existing_user = db_session.query(User).filter(User.username == user_data["username"]).first()
-        if not existing_user:
-            user = User(
-                email=user_data["email"],
-                username=user_data["username"],
-                password_hash=get_password_hash(user_data["password"]),
-                roles=["user"],
-                is_active=user_data["is_active"],
-                approved_by=admin_user.id if user_data["is_active"] else None,
-                approved_at=datetime.utcnow() if user_data["is_active"] else None
-            )
-            db_session.add(user)
-            created_users.append(user)
-        else:
-            created_users.append(existing_user)
+    # The sample users share a password; hash each distinct one once, not per user
+    password_hashes = {
+        password: get_password_hash(password)
+        for password in {user_data["password"] for user_data in sample_users}
+    }
+    
+    # One multi-row INSERT; users that already exist are skipped by the unique constraints
+    db_session.execute(
+        pg_insert(User).values([
+            {
+                "email": user_data["email"],
+                "username": user_data["username"],
+                "password_hash": password_hashes[user_data["password"]],
+                "roles": ["user"],
+                "is_active": user_data["is_active"],
+                "approved_by": admin_user.id if user_data["is_active"] else None,
+                "approved_at": datetime.utcnow() if user_data["is_active"] else None
+            }
+            for user_data in sample_users
+        ]).on_conflict_do_nothing()
+    )
     
+    # Inserted and pre-existing rows alike; the agents need their ids
+    created_users = db_session.execute(
+        select(User.id, User.is_active)
+        .where(User.username.in_([user_data["username"] for user_data in sample_users]))
+        .order_by(User.id)
+    ).all()
     db_session.commit()
     
     active_count = sum(1 for user in sample_users if user["is_active"])
@@ -144,23 +156,29 @@ def create_sample_agents(db_session, users):
     
     active_users = [user for user in users if user.is_active]
     
-    for i, agent_data in enumerate(sample_agents):
-        existing_agent = db_session.query(Agent).filter(Agent.name == agent_data["name"]).first()
-        if not existing_agent:
-            author = active_users[i % len(active_users)]
-            
-            agent = Agent(
-                name=agent_data["name"],
-                description=agent_data["description"],
-                app_url=agent_data["app_url"],
-                category=agent_data["category"],
-                author_id=author.id,
-                status=agent_data["status"],
-                approved_at=datetime.utcnow() if agent_data["status"] == AgentStatus.APPROVED.value else None
-            )
-            
-            db_session.add(agent)
+    existing_names = {
+        name for (name,) in db_session.query(Agent.name).filter(
+            Agent.name.in_([agent_data["name"] for agent_data in sample_agents])
+        )
+    }
+    
+    new_agents = [
+        {
+            "name": agent_data["name"],
+            "description": agent_data["description"],
+            "app_url": agent_data["app_url"],
+            "category": agent_data["category"],
+            "author_id": active_users[i % len(active_users)].id,
+            "status": agent_data["status"],
+            "approved_at": datetime.utcnow() if agent_data["status"] == AgentStatus.APPROVED.value else None
+        }
+        for i, agent_data in enumerate(sample_agents)
+        if agent_data["name"] not in existing_names
+    ]
     
+    # Agent names aren't unique in the schema, so the lookup above does the skipping
+    if new_agents:
+        db_session.execute(insert(Agent), new_agents)
     db_session.commit()
     
     approved_count = sum(1 for agent in sample_agents if agent["status"] == AgentStatus.APPROVED.value)
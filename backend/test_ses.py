@@ -7,7 +7,9 @@ import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 import os
 from dotenv import load_dotenv
 
@@ -33,13 +35,20 @@ try:
         'ses',
         aws_access_key_id=AWS_ACCESS_KEY_ID,
         aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        region_name=AWS_REGION
+        region_name=AWS_REGION,
+        config=Config(max_pool_connections=3, tcp_keepalive=True)
     )
     print("✅ SES client initialized successfully\n")
 
+    # The three probes are independent, so run them concurrently and report in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        verified_future = executor.submit(ses_client.list_verified_email_addresses)
+        sending_future = executor.submit(ses_client.get_account_sending_enabled)
+        quota_future = executor.submit(ses_client.get_send_quota)
+
     # Check verified email identities
     print("Checking verified email identities...")
-    response = ses_client.list_verified_email_addresses()
+    response = verified_future.result()
     verified_emails = response.get('VerifiedEmailAddresses', [])
 
     if verified_emails:
@@ -68,7 +77,7 @@ try:
     # Check account sending status
     print("\nChecking account sending status...")
     try:
-        account_info = ses_client.get_account_sending_enabled()
+        account_info = sending_future.result()
         if account_info.get('Enabled'):
             print("✅ Account sending is ENABLED")
         else:
@@ -79,7 +88,7 @@ try:
     # Check if in sandbox mode
     print("\nChecking sandbox status...")
     try:
-        quota = ses_client.get_send_quota()
+        quota = quota_future.result()
         max_send = quota.get('Max24HourSend', 0)
 
         if max_send == 200:
@@ -0,0 +1,134 @@
+import os
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+# The suite migrates the database it runs against (migrations may delete
+# duplicate rows), so it only ever uses a dedicated one. Settings are read at
+# import time, so point the app at it before importing anything from app.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from app.api.deps import get_current_user
+from app.core.database import engine, get_db, run_migrations
+from app.main import app
+from app.models.agent import Agent, AgentReview, AgentStatus, AgentCategory
+from app.models.base import Base
+from app.models.user import User
+from app.services.view_service import view_recorder
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """Bring the test database up to date, as the app does on startup"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f"Test database is unreachable: {e}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
+
+
+@pytest.fixture
+def connection():
+    """A connection whose outer transaction is rolled back after the test"""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        yield connection
+        transaction.rollback()
+
+
+@pytest.fixture
+def db(connection):
+    """Session on the test connection; commits become savepoints"""
+    session = Session(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_queries(connection):
+    """Context manager collecting the SQL statements run on the test connection inside its block"""
+    @contextmanager
+    def counting():
+        queries = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            queries.append(statement)
+
+        event.listen(connection, "before_cursor_execute", record)
+        try:
+            yield queries
+        finally:
+            event.remove(connection, "before_cursor_execute", record)
+
+    return counting
+
+
+@pytest.fixture
+def user(db):
+    user = User(
+        email="query-budget@example.com",
+        username="query_budget",
+        password_hash="x",
+        roles=["user"],
+        is_active=True
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+@pytest.fixture
+def client(db, user, monkeypatch):
+    """TestClient whose requests share the test session and run as user"""
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    # Keep buffered views in memory; a flush would write outside the test transaction
+    monkeypatch.setattr(view_recorder, "flush_due", lambda: False)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def agent_with_reviews(db, user):
+    """An approved agent among 60, with 30 reviews by different users"""
+    agents = [
+        Agent(
+            name=f"Query budget agent {i}",
+            description="Seeded to check query counts",
+            app_url="https://example.com",
+            category=AgentCategory.BUSINESS.value,
+            author_id=user.id,
+            status=AgentStatus.APPROVED.value
+        )
+        for i in range(60)
+    ]
+    reviewers = [
+        User(
+            email=f"reviewer{i}@example.com",
+            username=f"query_budget_reviewer{i}",
+            password_hash="x",
+            roles=["user"],
+            is_active=True
+        )
+        for i in range(30)
+    ]
+    db.add_all(agents + reviewers)
+    db.flush()
+
+    agent = agents[0]
+    db.add_all([
+        AgentReview(agent_id=agent.id, user_id=reviewer.id, rating=4, review_text="Useful")
+        for reviewer in reviewers
+    ])
+    db.flush()
+    return agent
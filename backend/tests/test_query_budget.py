@@ -0,0 +1,15 @@
+import pytest
+
+
+# Queries each endpoint may run, however many rows the page holds
+@pytest.mark.parametrize("path, budget", [
+    ("/api/v1/agents/?limit=50", 2),
+    ("/api/v1/agents/{agent_id}", 1),
+    ("/api/v1/agents/{agent_id}/reviews?limit=50", 2),
+])
+def test_endpoint_query_budget(client, count_queries, agent_with_reviews, path, budget):
+    with count_queries() as queries:
+        response = client.get(path.format(agent_id=agent_with_reviews.id))
+
+    assert response.status_code == 200
+    assert len(queries) <= budget, "\n\n".join(queries)